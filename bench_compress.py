@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Benchmark de compressão dos payloads publicados: tamanho x CPU por nível
+# (gzip 1-9; brotli 1-11 se o módulo existir). Usado para escolher os padrões
+# de MFE_GZIP_LEVEL / MFE_BR_QUALITY em mfe_publish.py.
+#
+#   python3 bench_compress.py                  # fixtures 77, 1k e 10k linhas
+#   python3 bench_compress.py /caminho/entrada.json
+
+import os, sys, time, json, random
+
+import mfe_publish
+from loadtest_panel import gen_coins, gen_rows
+
+REPEAT = int(os.environ.get("MFE_BENCH_REPEAT", "5"))
+TOL = 0.03  # nível "bom": até 3% maior que o menor tamanho
+
+def payload(n: int) -> bytes:
+    rows = gen_rows(gen_coins(n), random.Random(0), time.strftime("%Y-%m-%d %H:%M"))
+    return json.dumps({"posicional": rows, "ultima_atualizacao": "", "total_sinais": 0},
+                      ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+def best_time(fn, data) -> tuple:
+    best, out = None, None
+    for _ in range(REPEAT):
+        t0 = time.perf_counter()
+        out = fn(data)
+        dt = time.perf_counter() - t0
+        best = dt if best is None else min(best, dt)
+    return len(out), best
+
+def run(label: str, data: bytes):
+    print(f"== {label}: {len(data) / 1024:.1f} KiB ==")
+    for name, levels, fn in (
+        ("gzip", range(1, 10), lambda lv: (lambda d: mfe_publish.gzip_bytes(d, lv))),
+        ("brotli", range(1, 12), lambda lv: (lambda d: mfe_publish.brotli_bytes(d, lv))),
+    ):
+        if name == "brotli" and mfe_publish.brotli_bytes(b"x") is None:
+            print("  brotli: módulo não instalado")
+            continue
+        res = [(lv,) + best_time(fn(lv), data) for lv in levels]
+        smallest = min(r[1] for r in res)
+        for lv, size, dt in res:
+            print(f"  {name} {lv:2d}: {size / 1024:8.1f} KiB ({size / len(data):6.1%}) | {dt * 1000:8.2f} ms")
+        # sugestão: o nível mais barato dentro de TOL do menor tamanho
+        ok = [r for r in res if r[1] <= smallest * (1 + TOL)]
+        lv, size, dt = min(ok, key=lambda r: r[2])
+        print(f"  -> sugestão {name}: nível {lv} ({size / 1024:.1f} KiB, {dt * 1000:.2f} ms)")
+
+def main():
+    if len(sys.argv) > 1:
+        for p in sys.argv[1:]:
+            with open(p, "rb") as f:
+                run(p, f.read())
+        return
+    for n in (77, 1000, 10000):
+        run(f"{n} linhas", payload(n))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Benchmark: load_estudos (csv.DictReader) x mfe_csv.read_estudos_cols (colunar por blocos)
+# x mfe_sidecar (cache binário via mmap).
+# Gera um mfe_estudos.csv sintético (ou usa MFE_CSV) e confere se os dois
+# caminhos escolhem as mesmas linhas por PAR.
+#
+#   python3 bench_csv.py                 # 1.000.000 linhas
+#   MFE_BENCH_ROWS=5000000 python3 bench_csv.py
+
+import os, sys, time, random, tempfile
+
+import worker_mfe, mfe_csv, mfe_sidecar
+
+ROWS = int(os.environ.get("MFE_BENCH_ROWS", "1000000"))
+
+def gen_csv(path: str, n: int):
+    rnd = random.Random(42)
+    with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), "coins_77.txt"), encoding="utf-8") as f:
+        pars = [l.strip().upper() for l in f if l.strip() and not l.startswith("#")]
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("PAR;LADO;PERCENTIL;ALVO_PCT;DATA\n")
+        for _ in range(n):
+            f.write(f"{rnd.choice(pars)};{rnd.choice(('LONG','SHORT'))};"
+                    f"{rnd.uniform(30, 95):.2f}".replace(".", ",") + ";"
+                    + f"{rnd.uniform(0.5, 25):.2f}".replace(".", ",") + ";2025-12-27\n")
+
+def timed(fn, *a):
+    t0 = time.perf_counter()
+    r = fn(*a)
+    return r, time.perf_counter() - t0
+
+def main():
+    path = os.environ.get("MFE_CSV", "")
+    tmp = None
+    if not path or not os.path.isfile(path):
+        tmp = tempfile.NamedTemporaryFile(prefix="mfe_bench_", suffix=".csv", delete=False)
+        tmp.close()
+        path = tmp.name
+        gen_csv(path, ROWS)
+    try:
+        size_mb = os.path.getsize(path) / 1e6
+        rows, t_dict = timed(worker_mfe.load_estudos, path)
+        best_dict, t_dict_sel = timed(worker_mfe.choose_best_per_par, rows)
+        del rows
+        cols, t_cols = timed(mfe_csv.read_estudos_cols, path)
+        best_cols, t_cols_sel = timed(mfe_csv.choose_best_cols, cols)
+
+        side = path + ".bench.mfecol"
+        _, t_build = timed(mfe_sidecar.load_or_build, path, side)
+        sc, t_side = timed(mfe_sidecar.load_or_build, path, side)
+        best_side, t_side_sel = timed(mfe_sidecar.choose_best_sidecar, sc)
+        os.remove(side)
+
+        key = lambda bs: [(b["PAR"], b["LADO"], b["PERCENTIL"], b["ALVO_PCT"]) for b in bs]
+        same = key(best_dict) == key(best_cols)
+        # sidecar guarda float32: compara com 4 casas
+        r4 = lambda bs: [(b["PAR"], b["LADO"], round(b["PERCENTIL"], 2), round(b["ALVO_PCT"], 2)) for b in bs]
+        same = same and r4(best_dict) == r4(best_side)
+        print(f"arquivo: {path} ({size_mb:.1f} MB, {len(cols)} linhas)")
+        print(f"DictReader : leitura {t_dict:7.3f}s | escolha {t_dict_sel:6.3f}s")
+        print(f"colunar    : leitura {t_cols:7.3f}s | escolha {t_cols_sel:6.3f}s | {t_dict / t_cols:4.1f}x")
+        print(f"sidecar    : criação {t_build:7.3f}s | abertura {t_side:6.4f}s | escolha {t_side_sel:6.3f}s")
+        print(f"mesmas escolhas por PAR: {'SIM' if same else 'NÃO'}")
+        sys.exit(0 if same else 1)
+    finally:
+        if tmp is not None:
+            os.remove(path)
+
+if __name__ == "__main__":
+    main()
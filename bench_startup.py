@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Benchmark de regressão do tempo de import (python -X importtime).
+# Falha (exit 1) se o import dos scripts passar do orçamento ou se algum
+# módulo pesado voltar a ser importado no topo.
+#
+#   python3 bench_startup.py                 # orçamento padrão
+#   MFE_STARTUP_BUDGET_US=15000 python3 bench_startup.py
+
+import os, sys, subprocess
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+BUDGET_US = int(os.environ.get("MFE_STARTUP_BUDGET_US", "22000"))
+RUNS = int(os.environ.get("MFE_STARTUP_RUNS", "7"))
+TARGETS = ("worker_mfe", "mfe_enrich")
+# não podem aparecer só por importar os scripts
+FORBIDDEN = ("urllib.request", "http.client", "ssl", "csv", "tempfile", "zoneinfo", "sqlite3")
+
+# mede com .pyc (como em produção), mesmo se o ambiente desligar a escrita de bytecode
+ENV = {k: v for k, v in os.environ.items() if k != "PYTHONDONTWRITEBYTECODE"}
+
+def importtime(mod: str):
+    # devolve (cumulativo do módulo em us, conjunto de módulos importados por ele)
+    r = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {mod}"],
+        cwd=ROOT, capture_output=True, text=True, check=True, env=ENV,
+    )
+    base = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "pass"],
+        capture_output=True, text=True, check=True, env=ENV,
+    )
+    def names(txt):
+        out = {}
+        for line in txt.splitlines():
+            if not line.startswith("import time:") or "|" not in line:
+                continue
+            parts = line.split("|")
+            try:
+                cum = int(parts[1])
+            except ValueError:
+                continue
+            out[parts[2].strip()] = cum
+        return out
+    got = names(r.stderr)
+    extra = set(got) - set(names(base.stderr))
+    return got.get(mod, 0), extra
+
+def main():
+    fail = False
+    for mod in TARGETS:
+        importtime(mod)  # aquecimento: grava o .pyc
+        best, mods = None, set()
+        for _ in range(RUNS):
+            us, mods = importtime(mod)
+            best = us if best is None else min(best, us)
+        bad = sorted(m for m in FORBIDDEN if m in mods)
+        status = "OK" if best <= BUDGET_US and not bad else "FALHA"
+        fail |= status != "OK"
+        print(f"[{status}] {mod}: {best} us (orçamento {BUDGET_US} us, melhor de {RUNS})"
+              + (f" | imports pesados: {', '.join(bad)}" if bad else ""))
+    sys.exit(1 if fail else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Teste de carga do painel (/api/entrada e /api/top10).
+#   - gera entrada.json / top10.json / lista de moedas com 77, 1k e 10k linhas
+#   - sobe o painel local (node server.js) apontando para os fixtures
+#   - N clientes HTTP assíncronos (asyncio puro, keep-alive) na proporção dos
+#     polls reais: index.html a cada 10 s (/api/entrada), top10.html a cada 30 s
+#   - mede p50/p95/p99 e vazão, sem e com o "worker" reescrevendo os arquivos
+#
+#   python3 loadtest_panel.py                          # 77,1000,10000 linhas, 50 clientes, 10 s
+#   python3 loadtest_panel.py --rows 1000 --clients 200 --duration 20
+#   python3 loadtest_panel.py --url http://127.0.0.1:8082 --rows 77   # painel já rodando
+
+import os, json, time, random, shutil, asyncio, argparse, tempfile, subprocess
+from urllib.parse import urlparse
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+ENDPOINTS = (("/api/entrada", 3), ("/api/top10", 1))  # 10 s x 30 s de poll
+
+# ---- fixtures ----
+def gen_coins(n: int):
+    base = []
+    with open(os.path.join(ROOT, "coins_77.txt"), encoding="utf-8") as f:
+        base = [l.strip().upper() for l in f if l.strip() and not l.startswith("#")]
+    out = list(base[:n])
+    i = 0
+    while len(out) < n:
+        out.append(f"X{i:05d}")
+        i += 1
+    return out
+
+def gen_rows(coins, rnd, t_str):
+    rows = []
+    for par in coins:
+        side = rnd.choice(("LONG", "SHORT", "NÃO ENTRAR", "NÃO ENTRAR"))
+        preco = round(rnd.uniform(0.01, 50000), 3)
+        g = round(rnd.uniform(3, 25), 2)
+        alvo = round(preco * (1 + g / 100 if side == "LONG" else 1 - g / 100), 3)
+        sinal = side in ("LONG", "SHORT")
+        rows.append({
+            "par": par, "side": side, "preco": preco,
+            "alvo": alvo if sinal else "", "ganho_pct": g if sinal else "",
+            "zona": rnd.choice(("VERDE", "AMARELA", "VERMELHA")),
+            "risco": rnd.choice(("BAIXO", "MÉDIO", "ALTO")),
+            "prioridade": rnd.choice(("ALTA", "MÉDIA", "BAIXA")),
+            "data": t_str[:10], "hora": t_str[11:16],
+        })
+    return rows
+
+def atomic_write(path: str, obj):
+    tmp = f"{path}.tmp{os.getpid()}"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(obj, f, ensure_ascii=False, separators=(",", ":"))
+    os.replace(tmp, path)
+
+def write_fixtures(d: str, n: int, seed: int = 0):
+    rnd = random.Random(seed)
+    t_str = time.strftime("%Y-%m-%d %H:%M")
+    coins = gen_coins(n)
+    rows = gen_rows(coins, rnd, t_str)
+    sinais = [r for r in rows if r["side"] in ("LONG", "SHORT")]
+    atomic_write(os.path.join(d, "entrada.json"), {
+        "posicional": rows, "ultima_atualizacao": t_str, "assert_min": 65.0, "gain_min": 3.0,
+        "total_sinais": len(sinais), "total_moedas": len(rows),
+    })
+    top = sorted(sinais, key=lambda r: r["ganho_pct"], reverse=True)[:10]
+    atomic_write(os.path.join(d, "top10.json"), {
+        "agora_brt": t_str, "ultimo_calculo_brt": t_str, "total_universo": len(rows),
+        "total_sinais_universo": len(sinais), "exibindo": len(top), "top10": top,
+    })
+    with open(os.path.join(d, "coins.txt"), "w", encoding="utf-8") as f:
+        f.write("\n".join(coins) + "\n")
+
+# ---- painel local ----
+def start_panel(d: str, port: int):
+    node = shutil.which("node")
+    if not node:
+        raise SystemExit("node não encontrado (use --url para um painel já rodando)")
+    env = dict(os.environ, PORT=str(port),
+               ENTRADA_JSON=os.path.join(d, "entrada.json"),
+               TOP10_JSON=os.path.join(d, "top10.json"),
+               MFE_UNIVERSE_TXT=os.path.join(d, "coins.txt"))
+    env.pop("MFE_UNIVERSE", None)
+    proc = subprocess.Popen([node, os.path.join(ROOT, "server.js")], env=env, cwd=ROOT,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.time() + 15
+    while time.time() < deadline:
+        if proc.poll() is not None:
+            raise SystemExit(f"painel saiu: {proc.stderr.read().decode(errors='ignore')[-500:]}")
+        try:
+            st, _ = asyncio.run(_one_get(url, "/health"))
+            if st == 200:
+                return proc, url
+        except OSError:
+            pass
+        time.sleep(0.2)
+    proc.kill()
+    raise SystemExit("painel não respondeu /health")
+
+# ---- cliente HTTP/1.1 mínimo (keep-alive) ----
+async def _read_response(reader):
+    head = await reader.readuntil(b"\r\n\r\n")
+    lines = head.decode("latin1").split("\r\n")
+    status = int(lines[0].split()[1])
+    hdr = {}
+    for l in lines[1:]:
+        if ":" in l:
+            k, v = l.split(":", 1)
+            hdr[k.strip().lower()] = v.strip()
+    if "content-length" in hdr:
+        body = await reader.readexactly(int(hdr["content-length"]))
+    elif hdr.get("transfer-encoding", "").lower() == "chunked":
+        body = b""
+        while True:
+            size = int((await reader.readline()).strip().split(b";")[0], 16)
+            if size == 0:
+                await reader.readline()
+                break
+            body += await reader.readexactly(size)
+            await reader.readline()
+    else:
+        body = await reader.read()
+    return status, hdr, body
+
+async def _one_get(url: str, path: str):
+    u = urlparse(url)
+    reader, writer = await asyncio.open_connection(u.hostname, u.port or 80)
+    try:
+        writer.write(f"GET {path} HTTP/1.1\r\nHost: {u.netloc}\r\nConnection: close\r\n\r\n".encode())
+        await writer.drain()
+        st, _, body = await _read_response(reader)
+        return st, body
+    finally:
+        writer.close()
+
+class Stats:
+    def __init__(self):
+        self.lat = {p: [] for p, _ in ENDPOINTS}
+        self.err = {p: 0 for p, _ in ENDPOINTS}
+        self.bytes = 0
+
+async def client(url: str, stop_at: float, stats: Stats, rnd: random.Random):
+    u = urlparse(url)
+    reader = writer = None
+    paths = [p for p, w in ENDPOINTS for _ in range(w)]
+    while time.perf_counter() < stop_at:
+        path = rnd.choice(paths)
+        t0 = time.perf_counter()
+        try:
+            if writer is None:
+                reader, writer = await asyncio.open_connection(u.hostname, u.port or 80)
+            writer.write(f"GET {path} HTTP/1.1\r\nHost: {u.netloc}\r\nAccept-Encoding: identity\r\n\r\n".encode())
+            await writer.drain()
+            st, hdr, body = await _read_response(reader)
+            if st != 200:
+                stats.err[path] += 1
+            else:
+                stats.lat[path].append(time.perf_counter() - t0)
+                stats.bytes += len(body)
+            if hdr.get("connection", "").lower() == "close":
+                writer.close()
+                writer = None
+        except (OSError, asyncio.IncompleteReadError, ValueError, IndexError):
+            stats.err[path] += 1
+            if writer is not None:
+                writer.close()
+            writer = None
+    if writer is not None:
+        writer.close()
+
+async def rewriter(d: str, n: int, every: float, stop_at: float, count: list):
+    # simula o worker publicando (os.replace) durante o teste
+    seed = 1
+    while time.perf_counter() < stop_at:
+        await asyncio.sleep(every)
+        await asyncio.get_running_loop().run_in_executor(None, write_fixtures, d, n, seed)
+        seed += 1
+        count[0] += 1
+
+def pct(xs, q):
+    if not xs:
+        return float("nan")
+    s = sorted(xs)
+    return s[min(len(s) - 1, int(round(q / 100.0 * (len(s) - 1))))]
+
+async def run_scenario(url: str, clients: int, duration: float, d: str = None, n: int = 0, rewrite_every: float = 0):
+    stats = Stats()
+    stop_at = time.perf_counter() + duration
+    rewrites = [0]
+    tasks = [client(url, stop_at, stats, random.Random(i)) for i in range(clients)]
+    if rewrite_every > 0 and d:
+        tasks.append(rewriter(d, n, rewrite_every, stop_at, rewrites))
+    t0 = time.perf_counter()
+    await asyncio.gather(*tasks)
+    return stats, time.perf_counter() - t0, rewrites[0]
+
+def report(label: str, stats: Stats, elapsed: float, rewrites: int):
+    total = sum(len(v) for v in stats.lat.values())
+    errs = sum(stats.err.values())
+    print(f"  {label}: {total / elapsed:8.1f} req/s | {stats.bytes / elapsed / 1e6:6.2f} MB/s | "
+          f"erros {errs} | reescritas {rewrites}")
+    for path, lat in stats.lat.items():
+        ms = [x * 1000 for x in lat]
+        print(f"    {path:13s} n={len(ms):6d}  p50={pct(ms, 50):7.2f} ms  p95={pct(ms, 95):7.2f} ms  "
+              f"p99={pct(ms, 99):7.2f} ms  erros={stats.err[path]}")
+
+def main():
+    ap = argparse.ArgumentParser(description="teste de carga do painel MFE")
+    ap.add_argument("--rows", default="77,1000,10000", help="tamanhos do posicional (lista)")
+    ap.add_argument("--clients", type=int, default=50)
+    ap.add_argument("--duration", type=float, default=10.0, help="segundos por cenário")
+    ap.add_argument("--rewrite-every", type=float, default=1.0, help="intervalo das reescritas (0 = sem)")
+    ap.add_argument("--port", type=int, default=18082)
+    ap.add_argument("--url", default="", help="usa um painel já rodando (sem fixtures/reescrita)")
+    a = ap.parse_args()
+
+    for n in [int(x) for x in a.rows.split(",") if x.strip()]:
+        print(f"== {n} linhas | {a.clients} clientes | {a.duration:.0f} s ==")
+        if a.url:
+            stats, el, rw = asyncio.run(run_scenario(a.url, a.clients, a.duration))
+            report("painel externo", stats, el, rw)
+            continue
+        d = tempfile.mkdtemp(prefix="mfe_load_")
+        proc = None
+        try:
+            write_fixtures(d, n)
+            proc, url = start_panel(d, a.port)
+            stats, el, rw = asyncio.run(run_scenario(url, a.clients, a.duration))
+            report("arquivos estáveis", stats, el, rw)
+            if a.rewrite_every > 0:
+                stats, el, rw = asyncio.run(run_scenario(url, a.clients, a.duration, d, n, a.rewrite_every))
+                report("com reescrita ", stats, el, rw)
+        finally:
+            if proc is not None:
+                proc.terminate()
+                try:
+                    proc.wait(5)
+                except subprocess.TimeoutExpired:
+                    proc.kill()
+            shutil.rmtree(d, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Agregados publicados junto com as linhas (entrada.json / top10.json):
+# contagem e ganho_pct médio por side, zona, risco e prioridade + histograma
+# de ganho_pct (só linhas LONG/SHORT: em NÃO ENTRAR o ganho é vazio ou o
+# placeholder 0.0 do enrich). Acumula linha a linha enquanto o publicador monta
+# o payload, assim leitores (painel, enrich) não precisam varrer o posicional.
+
+import math
+
+DIMS = ("side", "zona", "risco", "prioridade")
+# limites dos buckets do histograma (ganho_pct, %): [0,3) [3,5) ... [30,+inf)
+BINS = (0.0, 3.0, 5.0, 7.5, 10.0, 15.0, 20.0, 30.0)
+
+def _bin_labels():
+    out = []
+    for i, lo in enumerate(BINS):
+        hi = BINS[i + 1] if i + 1 < len(BINS) else None
+        out.append(f"{lo:g}-{hi:g}" if hi is not None else f"{lo:g}+")
+    return out
+
+BIN_LABELS = _bin_labels()
+
+def _ganho(x):
+    if isinstance(x, (int, float)) and math.isfinite(x):
+        return float(x)
+    try:
+        v = float(str(x).replace(",", "."))
+        return v if math.isfinite(v) else None
+    except Exception:
+        return None
+
+class Agregador:
+    def __init__(self):
+        self.total = 0
+        self.sinais = 0
+        self.por = {d: {} for d in DIMS}   # dim -> valor -> [n, soma_ganho, n_ganho]
+        self.hist = [0] * len(BINS)
+
+    def add(self, row: dict):
+        self.total += 1
+        side = str(row.get("side", "")).upper()
+        g = None
+        if side in ("LONG", "SHORT"):
+            self.sinais += 1
+            g = _ganho(row.get("ganho_pct"))
+        for d in DIMS:
+            v = str(row.get(d, "") or "-")
+            acc = self.por[d].get(v)
+            if acc is None:
+                acc = self.por[d][v] = [0, 0.0, 0]
+            acc[0] += 1
+            if g is not None:
+                acc[1] += g
+                acc[2] += 1
+        if g is not None and g >= BINS[0]:
+            i = len(BINS) - 1
+            while g < BINS[i]:
+                i -= 1
+            self.hist[i] += 1
+        return row
+
+    def result(self) -> dict:
+        return {
+            "total": self.total,
+            "sinais": self.sinais,
+            **{d: {v: {"n": a[0], "ganho_medio": round(a[1] / a[2], 2) if a[2] else None}
+                   for v, a in sorted(self.por[d].items())} for d in DIMS},
+            "hist_ganho_pct": dict(zip(BIN_LABELS, self.hist)),
+        }
@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Sizing dos sinais ativos (LONG/SHORT): peso de cada posição em % do capital.
+#
+# Métodos (MFE_ALLOC_METHOD):
+#   ivol: peso ∝ 1/σ
+#   rp  : paridade de risco (cada posição contribui igual para o risco da carteira)
+#         quando nenhum teto é atingido; o teto por moeda tem precedência
+# Covariância das posições = retornos da janela do mfe_corr (sinal do lado
+# aplicado: SHORT entra com retorno invertido). A matriz N×N não é montada:
+# com X = retornos centrados (N posições × T candles), Σw = X·(Xᵀw)/T, então
+# cada iteração custa O(N·T). Com mais sinais que candles na janela essa Σ é
+# singular (dá para "zerar" o risco com hedges que só existem na amostra): usa
+# Σ encolhida para a diagonal, (1-δ)·Σ + δ·diag(Σ), δ = MFE_ALLOC_SHRINK.
+#
+# Depois da proporção, a escala leva a volatilidade da carteira (por candle, em
+# % do capital) a MFE_ALLOC_RISK, sem passar de MFE_ALLOC_GROSS de exposição
+# bruta nem de MFE_ALLOC_CAP por moeda (o que sobra do teto é redistribuído).
+
+import os, math
+from operator import mul
+
+METHOD = os.environ.get("MFE_ALLOC_METHOD", "rp").strip().lower()
+RISK = float(os.environ.get("MFE_ALLOC_RISK", "2.0"))       # vol alvo da carteira, % do capital por candle
+GROSS = float(os.environ.get("MFE_ALLOC_GROSS", "100.0"))   # soma máxima dos pesos, %
+CAP = float(os.environ.get("MFE_ALLOC_CAP", "20.0"))        # peso máximo por moeda, %
+TF = os.environ.get("MFE_ALLOC_TF", "1d")
+SHRINK = float(os.environ.get("MFE_ALLOC_SHRINK", "0.2"))
+ITERS = 50
+TOL = 1e-10
+
+def _sign(row) -> float:
+    return -1.0 if str(row.get("side", "")).upper() == "SHORT" else 1.0
+
+def position_matrix(pars, signs, rr, tf: str = TF):
+    # X (lista de linhas centradas, retorno da posição por ts) numa grade comum de ts;
+    # candle ausente na janela de uma moeda conta como retorno médio (0 depois de centrar)
+    grid = sorted({ts for p in pars for ts, _ in rr.series[(p, tf)][0]})
+    col = {ts: i for i, ts in enumerate(grid)}
+    X = []
+    for p, s in zip(pars, signs):
+        win = rr.series[(p, tf)][0]
+        m = sum(r for _, r in win) / len(win)
+        row = [0.0] * len(grid)
+        for ts, r in win:
+            row[col[ts]] = s * (r - m)
+        X.append(row)
+    return X, len(grid)
+
+class Cov:
+    # Σ encolhida das posições, aplicada sem montar a matriz
+    def __init__(self, X, T: int, shrink: float = SHRINK):
+        self.X, self.T, self.shrink = X, T, shrink
+        self.diag = [sum(v * v for v in row) / T for row in X]
+
+    def xt(self, w):
+        out = [0.0] * self.T
+        for wi, row in zip(w, self.X):
+            if wi:
+                for t, v in enumerate(row):
+                    out[t] += wi * v
+        return out
+
+    def dot(self, w, xt=None):
+        # Σw (xt = Xᵀw já calculado, se houver)
+        xt = self.xt(w) if xt is None else xt
+        k = 1.0 - self.shrink
+        return [k * sum(a * b for a, b in zip(row, xt)) / self.T + self.shrink * d * wi
+                for row, d, wi in zip(self.X, self.diag, w)]
+
+    def var(self, w) -> float:
+        return sum(a * b for a, b in zip(w, self.dot(w)))
+
+def _chol_solve(M, rhs):
+    # resolve M x = rhs com M simétrica positiva (T×T, T pequeno)
+    n = len(M)
+    L = [[0.0] * n for _ in range(n)]
+    for i in range(n):
+        Li = L[i]
+        for j in range(i + 1):
+            Lj = L[j]
+            v = M[i][j] - sum(map(mul, Li[:j], Lj[:j]))
+            if i == j:
+                Li[i] = math.sqrt(max(v, 1e-300))
+            else:
+                Li[j] = v / Lj[j]
+    y = [0.0] * n
+    for i in range(n):
+        y[i] = (rhs[i] - sum(map(mul, L[i][:i], y[:i]))) / L[i][i]
+    x = [0.0] * n
+    for i in reversed(range(n)):
+        x[i] = (y[i] - sum(L[j][i] * x[j] for j in range(i + 1, n))) / L[i][i]
+    return x
+
+def risk_parity(cov: Cov, w0):
+    # Newton em f(y) = ½yᵀΣy - Σ log(y_i)/N (convexa; no mínimo y_i·(Σy)_i = 1/N,
+    # ou seja, contribuições de risco iguais). Hessiana = D + U·Uᵀ com D diagonal e
+    # U = √((1-δ)/T)·X de posto T: pela identidade de Woodbury cada passo resolve
+    # só um sistema T×T. Converge em poucas iterações mesmo com blocos de moedas
+    # muito correlacionadas, onde o método coordenada a coordenada se arrasta.
+    n = len(w0)
+    b = 1.0 / n
+    T = cov.T
+    c = math.sqrt((1.0 - cov.shrink) / T)
+    cols = [[row[t] * c for row in cov.X] for t in range(T)]
+
+    def f(y):
+        return 0.5 * cov.var(y) - b * sum(math.log(v) for v in y)
+
+    v0 = cov.var(w0)
+    y = [w / math.sqrt(v0) for w in w0] if v0 > 0 else list(w0)
+    for _ in range(ITERS):
+        g = [s - b / v for s, v in zip(cov.dot(y), y)]
+        Di = [1.0 / (cov.shrink * d + b / (v * v)) for d, v in zip(cov.diag, y)]
+        cd = [list(map(mul, col, Di)) for col in cols]
+        M = [[0.0] * T for _ in range(T)]
+        for s_ in range(T):
+            for t in range(s_, T):
+                M[s_][t] = M[t][s_] = sum(map(mul, cd[s_], cols[t]))
+            M[s_][s_] += 1.0
+        Dg = list(map(mul, Di, g))
+        z = _chol_solve(M, [sum(map(mul, col, Dg)) for col in cols])
+        Uz = [0.0] * n
+        for t, zt in enumerate(z):
+            if zt:
+                Uz = [u + zt * v for u, v in zip(Uz, cols[t])]
+        d = [dg - di * u for dg, di, u in zip(Dg, Di, Uz)]
+        dec = sum(map(mul, g, d))   # decremento de Newton
+        if dec / 2.0 < TOL:
+            break
+        # passo amortecido: y continua positivo e f desce (Armijo)
+        step, f0 = 1.0, f(y)
+        while step > 1e-10:
+            yn = [v - step * dv for v, dv in zip(y, d)]
+            if min(yn) > 0 and f(yn) <= f0 - 0.25 * step * dec:
+                break
+            step *= 0.5
+        else:
+            break
+        y = yn
+    tot = sum(y)
+    return [v / tot for v in y]
+
+def scale(cov: Cov, base, risk: float = RISK, gross: float = GROSS, cap: float = CAP):
+    # pesos (fração do capital) = fixos (no teto) + k·livres, com k o maior que
+    # respeita vol alvo e exposição bruta; repete enquanto alguém estoura o teto
+    risk, gross, cap = risk / 100.0, gross / 100.0, cap / 100.0
+    n = len(base)
+    fixed = [False] * n
+    w = [0.0] * n
+    for _ in range(n + 1):
+        free = [0.0 if fixed[i] else base[i] for i in range(n)]
+        fix = [cap if fixed[i] else 0.0 for i in range(n)]
+        if not any(free):
+            w = fix
+            break
+        # var(fix + k·free) = a k² + 2 b k + c
+        sf = cov.dot(free)
+        a = sum(x * y for x, y in zip(free, sf))
+        b = sum(x * y for x, y in zip(fix, sf))
+        c = cov.var(fix)
+        k_gross = max(0.0, (gross - sum(fix)) / sum(free))
+        if a > 0:
+            disc = b * b - a * (c - risk * risk)
+            k_risk = max(0.0, (-b + math.sqrt(disc)) / a) if disc >= 0 else 0.0
+        else:
+            k_risk = k_gross
+        k = min(k_gross, k_risk)
+        w = [fix[i] + k * free[i] for i in range(n)]
+        over = [i for i in range(n) if not fixed[i] and w[i] > cap + 1e-12]
+        if not over:
+            break
+        for i in over:
+            fixed[i] = True
+    return w
+
+def allocate(rows, method: str = METHOD, rr=None, tf: str = TF):
+    # grava peso_pct nas linhas LONG/SHORT com histórico; devolve o resumo da carteira
+    import mfe_corr
+    ativos = [r for r in rows if str(r.get("side", "")).upper() in ("LONG", "SHORT")]
+    if rr is None:
+        rr = mfe_corr.shared()
+        rr.retain([(r.get("par") or "").upper() for r in rows], tf)   # rows = universo todo
+        rr.update_from_cache([(r.get("par") or "").upper() for r in ativos], tf)
+    sel, vols = [], []
+    for r in ativos:
+        v = rr.vol((r.get("par") or "").upper(), tf)
+        if v:
+            sel.append(r)
+            vols.append(v)
+        else:
+            r["peso_pct"] = None   # sem histórico: sem tamanho
+    resumo = {"metodo": method, "risco_alvo_pct": RISK, "n": len(sel)}
+    if not sel:
+        return resumo
+    pars = [(r.get("par") or "").upper() for r in sel]
+    cov = Cov(*position_matrix(pars, [_sign(r) for r in sel], rr, tf))
+    inv = [1.0 / v for v in vols]
+    tot = sum(inv)
+    base = [x / tot for x in inv]
+    if method == "rp":
+        base = risk_parity(cov, base)
+    w = scale(cov, base)
+    for r, wi in zip(sel, w):
+        r["peso_pct"] = round(wi * 100.0, 2)
+    resumo["risco_pct"] = round(math.sqrt(max(0.0, cov.var(w))) * 100.0, 3)
+    resumo["bruto_pct"] = round(sum(w) * 100.0, 2)
+    return resumo
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Cache LRU compartilhado para objetos derivados por PAR (linhas calculadas,
+# estudos escolhidos, preços, candles/indicadores) com orçamento de memória.
+# Despejo por tamanho (MFE_CACHE_MB), idade (MFE_CACHE_MAX_AGE, s) e quantidade.
+# Entrada despejada é reconstruída sob demanda (get_or_build) no próximo acesso.
+# Thread-safe: no modo residente o servidor de controle (mfe_ctl) e o ciclo
+# principal usam o mesmo cache; o builder do get_or_build roda fora do lock.
+
+import os, sys, time, threading
+from array import array
+from collections import OrderedDict
+
+CACHE_MB      = float(os.environ.get("MFE_CACHE_MB", "64"))
+CACHE_MAX_AGE = float(os.environ.get("MFE_CACHE_MAX_AGE", "0"))   # 0 = sem limite de idade
+CACHE_ITEMS   = int(os.environ.get("MFE_CACHE_ITEMS", "0"))       # 0 = sem limite de itens
+
+SAMPLE = 64
+
+def approx_size(obj, _depth=0) -> int:
+    # estimativa barata (sys.getsizeof + filhos até 3 níveis; listas grandes por
+    # amostra dos primeiros SAMPLE itens); views sobre mmap contam só o objeto view
+    if isinstance(obj, memoryview):
+        return sys.getsizeof(obj)
+    n = sys.getsizeof(obj)
+    if _depth >= 3 or isinstance(obj, (str, bytes, array, int, float)):
+        return n
+    if isinstance(obj, dict):
+        return n + sum(approx_size(k, _depth + 1) + approx_size(v, _depth + 1) for k, v in obj.items())
+    if isinstance(obj, (list, tuple)) and len(obj) > SAMPLE:
+        return n + len(obj) * sum(approx_size(x, _depth + 1) for x in obj[:SAMPLE]) // SAMPLE
+    if isinstance(obj, (list, tuple, set, frozenset)):
+        return n + sum(approx_size(x, _depth + 1) for x in obj)
+    slots = getattr(type(obj), "__slots__", None)
+    if slots:
+        return n + sum(approx_size(getattr(obj, s, None), _depth + 1) for s in slots)
+    d = getattr(obj, "__dict__", None)
+    return n + (approx_size(d, _depth + 1) if d else 0)
+
+class LRUCache:
+    def __init__(self, max_bytes: int = None, max_age: float = None, max_items: int = None):
+        self.max_bytes = int(CACHE_MB * 1024 * 1024) if max_bytes is None else int(max_bytes)
+        self.max_age = CACHE_MAX_AGE if max_age is None else float(max_age)
+        self.max_items = CACHE_ITEMS if max_items is None else int(max_items)
+        self.data = OrderedDict()  # chave -> (valor, tamanho, criado_em)
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expired = 0
+        self.oversize = 0
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        with self.lock:
+            return len(self.data)
+
+    def __contains__(self, key):
+        with self.lock:
+            return key in self.data
+
+    def _drop(self, key):
+        _, size, _ = self.data.pop(key)
+        self.bytes -= size
+
+    def get(self, key, default=None):
+        with self.lock:
+            it = self.data.get(key)
+            if it is None:
+                self.misses += 1
+                return default
+            if self.max_age > 0 and time.monotonic() - it[2] > self.max_age:
+                self._drop(key)
+                self.expired += 1
+                self.misses += 1
+                return default
+            self.data.move_to_end(key)
+            self.hits += 1
+            return it[0]
+
+    def put(self, key, value, size: int = None):
+        size = approx_size(value) if size is None else int(size)
+        with self.lock:
+            if key in self.data:
+                self._drop(key)
+            if size > self.max_bytes:
+                self.oversize += 1  # maior que o orçamento inteiro: não guarda (nem despeja os outros)
+                return value
+            self.data[key] = (value, size, time.monotonic())
+            self.bytes += size
+            self._evict()
+            return value
+
+    def get_or_build(self, key, builder, size: int = None):
+        miss = object()
+        v = self.get(key, miss)
+        if v is miss:
+            v = self.put(key, builder(), size)
+        return v
+
+    def pop(self, key, default=None):
+        with self.lock:
+            if key not in self.data:
+                return default
+            v = self.data[key][0]
+            self._drop(key)
+            return v
+
+    def drop_where(self, pred) -> int:
+        with self.lock:
+            keys = [k for k in self.data if pred(k)]
+            for k in keys:
+                self._drop(k)
+            return len(keys)
+
+    def keys_where(self, pred):
+        with self.lock:
+            return [k for k in self.data if pred(k)]
+
+    def _evict(self):
+        # chamado com o lock
+        while self.data and (self.bytes > self.max_bytes or (self.max_items and len(self.data) > self.max_items)):
+            k = next(iter(self.data))
+            self._drop(k)
+            self.evictions += 1
+
+    def stats(self) -> dict:
+        with self.lock:
+            return self._stats()
+
+    def _stats(self) -> dict:
+        tot = self.hits + self.misses
+        return {
+            "itens": len(self.data),
+            "bytes": self.bytes,
+            "orcamento_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / tot, 4) if tot else 0.0,
+            "evictions": self.evictions,
+            "expired": self.expired,
+            "oversize": self.oversize,
+        }
+
+_SHARED = None
+_SHARED_LOCK = threading.Lock()
+
+def shared() -> LRUCache:
+    # um cache por processo: todos os consumidores dividem o mesmo orçamento
+    global _SHARED
+    if _SHARED is None:
+        with _SHARED_LOCK:
+            if _SHARED is None:
+                _SHARED = LRUCache()
+    return _SHARED
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Intervalo de confiança (bootstrap) da taxa de acerto por PAR.
+#
+# Histórico de resultados: para cada entrada passada do cache OHLCV, o MFE no
+# horizonte HOLD (mesmo cálculo do mfe_estudos_gen); acerto = MFE >= ALVO_PCT
+# do estudo escolhido. Com k acertos em n entradas, reamostrar as n entradas
+# com reposição dá k* ~ Binomial(n, k/n): a distribuição bootstrap sai exata da
+# binomial, sem sortear reamostras. IC percentil = quantis CONF da binomial / n.
+#
+# Os MFEs ficam ordenados por PAR/LADO no cache LRU do processo (mfe_cache),
+# com a assinatura do arquivo de candles na chave (ciclo sem candle novo nem
+# relê o arquivo; versão velha sai por LRU, dentro do orçamento MFE_CACHE_MB);
+# contar acertos para qualquer ALVO_PCT é uma busca binária.
+
+import os, math
+from bisect import bisect_left
+
+CONF = float(os.environ.get("MFE_ASSERT_CI_CONF", "0.90"))
+MIN_OBS = int(os.environ.get("MFE_ASSERT_CI_MIN_OBS", "30"))   # legado: total >= 30
+TF = os.environ.get("MFE_ASSERT_CI_TF", "1d")
+
+def _build_outcomes(par: str, tf: str):
+    import mfe_ohlcv, mfe_estudos_gen
+    closes, highs, lows = mfe_ohlcv.columns(mfe_ohlcv.load(par, tf))
+    longs, shorts = mfe_estudos_gen.excursions(closes, highs, lows)
+    longs.sort()
+    shorts.sort()
+    return longs, shorts
+
+def outcomes(par: str, tf: str = TF):
+    # (mfe LONG ordenado, mfe SHORT ordenado)
+    import mfe_ohlcv, mfe_cache
+    sig = mfe_ohlcv.sig(par, tf)
+    if sig is None:
+        return [], []
+    return mfe_cache.shared().get_or_build(("ci_mfe", par, tf, sig), lambda: _build_outcomes(par, tf))
+
+def binom_quantile(n: int, p: float, q: float) -> int:
+    # menor k com P(X <= k) >= q, X ~ Binomial(n, p)
+    if p <= 0.0:
+        return 0
+    if p >= 1.0:
+        return n
+    lp, lq = math.log(p), math.log1p(-p)
+    lg_n = math.lgamma(n + 1)
+    acc = 0.0
+    for k in range(n + 1):
+        acc += math.exp(lg_n - math.lgamma(k + 1) - math.lgamma(n - k + 1) + k * lp + (n - k) * lq)
+        if acc >= q - 1e-12:
+            return k
+    return n
+
+def bootstrap_ci(k: int, n: int, conf: float = CONF):
+    # (lo, hi) da taxa de acerto, em fração
+    p = k / n
+    a = (1.0 - conf) / 2.0
+    return binom_quantile(n, p, a) / n, binom_quantile(n, p, 1.0 - a) / n
+
+def hit_ci(par: str, lado: str, alvo_pct: float, conf: float = CONF, tf: str = TF):
+    # {"n", "acertos", "taxa", "lo", "hi"} (taxas em %) ou None sem histórico suficiente
+    import mfe_ohlcv, mfe_cache
+    key = ("ci", par, tf, mfe_ohlcv.sig(par, tf), lado, float(alvo_pct), conf)
+    return mfe_cache.shared().get_or_build(key, lambda: _hit_ci(par, lado, float(alvo_pct), conf, tf))
+
+def _hit_ci(par: str, lado: str, alvo_pct: float, conf: float, tf: str):
+    longs, shorts = outcomes(par, tf)
+    mfe = longs if lado == "LONG" else shorts if lado == "SHORT" else []
+    n = len(mfe)
+    ci = None
+    if n >= MIN_OBS:
+        k = n - bisect_left(mfe, float(alvo_pct))
+        lo, hi = bootstrap_ci(k, n, conf)
+        ci = {"n": n, "acertos": k, "taxa": round(100.0 * k / n, 1),
+              "lo": round(100.0 * lo, 1), "hi": round(100.0 * hi, 1)}
+    return ci
+
+def for_escolhidos(escolhidos, conf: float = CONF) -> dict:
+    # PAR -> IC (ou None) para o estudo escolhido de cada PAR
+    out = {}
+    for e in escolhidos:
+        par = e["PAR"]
+        try:
+            out[par] = hit_ci(par, e["LADO"], float(e["ALVO_PCT"]), conf)
+        except Exception:
+            out[par] = None
+    return out
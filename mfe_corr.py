@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Correlação de retornos para diversificar o TOP10 (e, depois, o sizing).
+# Retornos log dos candles fechados do cache OHLCV (mfe_ohlcv), janela móvel de
+# MFE_CORR_WINDOW retornos por moeda. Por moeda ficam a janela e as somas
+# corridas (Σr, Σr²): candle novo entra, o mais velho sai, sem recalcular tudo.
+# A matriz inteira (N² pares) não é montada: a correlação de um par sai de um
+# produto escalar das duas janelas, e só para os pares que a seleção consulta.
+#
+# Correlação das posições: corr(i, j) * s_i * s_j com s = +1 LONG / -1 SHORT
+# (dois SHORTs em moedas correlacionadas = mesma aposta; LONG x SHORT = hedge).
+
+import os, math
+from collections import deque
+
+WINDOW = int(os.environ.get("MFE_CORR_WINDOW", "60"))      # retornos na janela
+MIN_OBS = int(os.environ.get("MFE_CORR_MIN_OBS", "20"))    # sobreposição mínima p/ confiar na correlação
+TF = os.environ.get("MFE_CORR_TF", "1d")
+
+class RollingReturns:
+    def __init__(self, window: int = WINDOW):
+        self.window = window
+        # por (PAR, tf): TOP10 (MFE_CORR_TF) e sizing (MFE_ALLOC_TF) podem usar
+        # timeframes diferentes na mesma instância
+        self.series = {}   # (PAR, tf) -> [deque[(ts, r)], Σr, Σr², último ts, último close]
+        self.sigs = {}     # (PAR, tf) -> assinatura do arquivo de candles já incorporado
+
+    def update(self, par: str, candles, tf: str = TF) -> int:
+        # acrescenta os candles depois do último visto; devolve quantos retornos entraram
+        key = (par, tf)
+        st = self.series.get(key)
+        if st is None:
+            st = self.series[key] = [deque(), 0.0, 0.0, None, None]
+        win, s1, s2, last_ts, last_c = st
+        # só o rabo novo (a janela precisa de no máximo window+1 candles)
+        start = max(0, len(candles) - self.window - 1)
+        if last_ts is not None:
+            i = len(candles)
+            while i > start and candles[i - 1][0] > last_ts:
+                i -= 1
+            start = i
+        n = 0
+        for c in candles[start:]:
+            ts, close = c[0], c[4]
+            if last_c and close > 0:
+                r = math.log(close / last_c)
+                win.append((ts, r))
+                s1 += r
+                s2 += r * r
+                n += 1
+                if len(win) > self.window:
+                    _, old = win.popleft()
+                    s1 -= old
+                    s2 -= old * old
+            last_ts, last_c = ts, close
+        st[1], st[2], st[3], st[4] = s1, s2, last_ts, last_c
+        return n
+
+    def update_from_cache(self, pars, tf: str = TF):
+        # arquivo de candles sem mudança desde a última vez: nem relê
+        import mfe_ohlcv
+        for p in pars:
+            sig = mfe_ohlcv.sig(p, tf)
+            if sig is None or self.sigs.get((p, tf)) == sig:
+                continue
+            self.update(p, mfe_ohlcv.load(p, tf), tf)
+            self.sigs[(p, tf)] = sig
+
+    def retain(self, pars, tf: str = TF) -> int:
+        # descarta as janelas desse tf de moedas fora do universo atual (saíram do
+        # coins_file): no processo residente elas ficariam para sempre
+        keep = set(pars)
+        drop = [k for k in self.series if k[1] == tf and k[0] not in keep]
+        for k in drop:
+            self.series.pop(k, None)
+            self.sigs.pop(k, None)
+        return len(drop)
+
+    def vol(self, par: str, tf: str = TF):
+        # desvio padrão dos retornos da janela (por candle) ou None
+        st = self.series.get((par, tf))
+        if st is None or len(st[0]) < MIN_OBS:
+            return None
+        n = len(st[0])
+        var = max(0.0, st[2] / n - (st[1] / n) ** 2)
+        return math.sqrt(var)
+
+    def corr(self, a: str, b: str, tf: str = TF):
+        sa, sb = self.series.get((a, tf)), self.series.get((b, tf))
+        if sa is None or sb is None:
+            return None
+        wa, wb = sa[0], sb[0]
+        if len(wa) == len(wb) and wa and wa[0][0] == wb[0][0] and wa[-1][0] == wb[-1][0]:
+            # janelas alinhadas (caso normal): momentos das somas corridas + um produto escalar
+            n = len(wa)
+            if n < MIN_OBS:
+                return None
+            dot = sum(x[1] * y[1] for x, y in zip(wa, wb))
+            ma, mb = sa[1] / n, sb[1] / n
+            va, vb = sa[2] / n - ma * ma, sb[2] / n - mb * mb
+        else:
+            # histórico desalinhado (moeda nova, candle faltando): só a interseção
+            rb = dict(wb)
+            pairs = [(r, rb[ts]) for ts, r in wa if ts in rb]
+            n = len(pairs)
+            if n < MIN_OBS:
+                return None
+            ma = sum(x for x, _ in pairs) / n
+            mb = sum(y for _, y in pairs) / n
+            dot = sum(x * y for x, y in pairs)
+            va = sum(x * x for x, _ in pairs) / n - ma * ma
+            vb = sum(y * y for _, y in pairs) / n - mb * mb
+        if va <= 0 or vb <= 0:
+            return None
+        return max(-1.0, min(1.0, (dot / n - ma * mb) / math.sqrt(va * vb)))
+
+    def matrix(self, pars, tf: str = TF):
+        # matriz densa só para um subconjunto pequeno (ex.: sinais ativos)
+        m = [[1.0] * len(pars) for _ in pars]
+        for i in range(len(pars)):
+            for j in range(i + 1, len(pars)):
+                c = self.corr(pars[i], pars[j], tf)
+                m[i][j] = m[j][i] = 0.0 if c is None else c
+        return m
+
+_SHARED = None
+
+def shared() -> RollingReturns:
+    # uma instância por processo: no modo residente do worker o enrich roda no
+    # mesmo processo e cada ciclo só acrescenta os candles novos
+    global _SHARED
+    if _SHARED is None:
+        _SHARED = RollingReturns()
+    return _SHARED
+
+def _sign(row) -> float:
+    return -1.0 if str(row.get("side", "")).upper() == "SHORT" else 1.0
+
+def diversify(rows, n: int, max_corr: float, rr: RollingReturns = None, tf: str = TF, universe=None):
+    # guloso: percorre `rows` na ordem do ranking e aceita a linha se a correlação
+    # da posição com todas as já escolhidas for <= max_corr (sem histórico = aceita).
+    # Pode devolver menos de n linhas se o universo for todo uma aposta só.
+    # universe: PARs de todas as linhas publicadas (janelas de quem saiu são descartadas)
+    if rr is None:
+        rr = shared()
+        if universe is not None:
+            rr.retain(universe, tf)
+        rr.update_from_cache([(r.get("par") or "").upper() for r in rows], tf)
+    chosen = []
+    for r in rows:
+        if len(chosen) >= n:
+            break
+        par = (r.get("par") or "").upper()
+        ok = True
+        for c in chosen:
+            k = rr.corr(par, (c.get("par") or "").upper(), tf)
+            if k is not None and k * _sign(r) * _sign(c) > max_corr:
+                ok = False
+                break
+        if ok:
+            chosen.append(r)
+    return chosen
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Leitor colunar por blocos para mfe_estudos.csv (PAR;LADO;PERCENTIL;ALVO_PCT).
+# Lê o arquivo em blocos de tamanho fixo, converte vírgula decimal no bloco
+# inteiro, guarda só as 4 colunas em arrays e interna as strings de PAR/LADO.
+# Sem um dict por linha (como o csv.DictReader).
+# Limite: não trata ";" ou quebra de linha dentro de campo entre aspas (o export
+# do autotrader-planilhas-python não gera isso).
+
+import os, sys
+from array import array
+
+BLOCK = int(os.environ.get("MFE_CSV_BLOCK", str(1 << 20)))
+NEED = ("PAR", "LADO", "PERCENTIL", "ALVO_PCT")
+
+class EstudosCols:
+    # colunas paralelas; iterar devolve dicts (só para quem precisa de linhas, ex.: SQLite)
+    __slots__ = ("par", "lado", "percentil", "alvo_pct")
+
+    def __init__(self):
+        self.par = []
+        self.lado = []
+        self.percentil = array("d")
+        self.alvo_pct = array("d")
+
+    def __len__(self):
+        return len(self.par)
+
+    def __iter__(self):
+        for i in range(len(self.par)):
+            yield {"PAR": self.par[i], "LADO": self.lado[i],
+                   "PERCENTIL": self.percentil[i], "ALVO_PCT": self.alvo_pct[i]}
+
+def _lado(s: str) -> str:
+    return "LONG" if "LONG" in s else ("SHORT" if "SHORT" in s else s)
+
+def _num(s: str) -> float:
+    s = s.strip().strip('"')
+    if not s:
+        return 0.0
+    try:
+        return float(s)
+    except ValueError:
+        return 0.0
+
+def read_estudos_cols(csv_path: str, block: int = None) -> EstudosCols:
+    block = block or BLOCK
+    cols = EstudosCols()
+    par_a, lado_a = cols.par.append, cols.lado.append
+    pc_a, al_a = cols.percentil.append, cols.alvo_pct.append
+    intern = sys.intern
+    lado_cache = {}
+    idx = None
+    tail = b""
+
+    with open(csv_path, "rb") as f:
+        while True:
+            buf = f.read(block)
+            eof = not buf
+            data = tail + buf
+            if not eof:
+                cut = data.rfind(b"\n")
+                if cut < 0:
+                    tail = data
+                    continue
+                data, tail = data[:cut], data[cut + 1:]
+            else:
+                tail = b""
+            text = data.decode("utf-8")
+
+            if idx is None:
+                nl = text.find("\n")
+                head, text = (text, "") if nl < 0 else (text[:nl], text[nl + 1:])
+                names = [c.strip().strip('"').upper() for c in head.lstrip("\ufeff").rstrip("\r").split(";")]
+                if not set(NEED).issubset(names):
+                    raise RuntimeError("CSV inválido: esperado colunas PAR;LADO;PERCENTIL;ALVO_PCT")
+                idx = [names.index(c) for c in NEED]
+                ip, il, ipc, ia = idx
+                width = max(idx) + 1
+
+            # vírgula decimal -> ponto no bloco inteiro (delimitador é ";")
+            for line in text.replace(",", ".").split("\n"):
+                fs = line.split(";")
+                if len(fs) < width:
+                    if not line.strip():
+                        continue
+                    fs += [""] * (width - len(fs))
+                par = fs[ip].strip().strip('"').upper()
+                if not par:
+                    continue
+                lr = fs[il]
+                lado = lado_cache.get(lr)
+                if lado is None:
+                    lado = lado_cache[lr] = intern(_lado(lr.strip().strip('"').upper()))
+                par_a(intern(par))
+                lado_a(lado)
+                pc_a(_num(fs[ipc]))
+                al_a(_num(fs[ia]))
+            if eof:
+                break
+    return cols
+
+def choose_best_cols(cols: EstudosCols):
+    # mesmo critério de worker_mfe.choose_best_per_par (score = ALVO_PCT * PERCENTIL/100,
+    # em empate fica o primeiro), direto nas colunas
+    best = {}
+    par, pc, al = cols.par, cols.percentil, cols.alvo_pct
+    for i in range(len(par)):
+        sc = al[i] * (pc[i] / 100.0)
+        b = best.get(par[i])
+        if b is None or sc > b[0]:
+            best[par[i]] = (sc, i)
+    out = []
+    for k in sorted(best):
+        sc, i = best[k]
+        out.append({"PAR": k, "LADO": cols.lado[i], "PERCENTIL": pc[i], "ALVO_PCT": al[i], "_SCORE": sc})
+    return out
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Controle do worker residente por socket unix (MFE_CTL_SOCK).
+# Protocolo: uma linha de comando por conexão, resposta em uma linha JSON.
+#
+#   recompute                       recalcula com estudos/preços em memória e publica
+#   recompute PAR=BTC[,ETH]         força o recálculo só desses PARs
+#   set-threshold ASSERT_MIN=70 GAIN_MIN=4
+#   stats
+#
+# Cliente:  python3 mfe_ctl.py "recompute PAR=BTC"
+
+import os, sys, json, time, socket, socketserver, threading
+
+CTL_SOCK = os.environ.get("MFE_CTL_SOCK", "/tmp/mfe_worker.sock")
+
+def _kv(args):
+    out = {}
+    for a in args:
+        if "=" in a:
+            k, v = a.split("=", 1)
+            out[k.strip().upper()] = v.strip()
+    return out
+
+def handle_command(state, line: str) -> dict:
+    parts = line.strip().split()
+    if not parts:
+        return {"ok": False, "erro": "comando vazio"}
+    cmd, kv = parts[0].lower(), _kv(parts[1:])
+    t0 = time.perf_counter()
+
+    if cmd == "stats":
+        res = state.stats()
+    elif cmd == "recompute":
+        pars = [p.strip().upper() for p in kv.get("PAR", "").split(",") if p.strip()]
+        payload = state.recompute(pars or None)
+        res = {**state.tracker.stats(), "total_sinais": payload.get("total_sinais"),
+               "ultima_atualizacao": payload.get("ultima_atualizacao")}
+        if pars:
+            res["linhas"] = [r for r in payload["posicional"] if r["par"] in pars]
+    elif cmd == "set-threshold":
+        if not ({"ASSERT_MIN", "GAIN_MIN"} & set(kv)):
+            return {"ok": False, "erro": "use ASSERT_MIN=.. e/ou GAIN_MIN=.."}
+        try:
+            state.set_thresholds(kv.get("ASSERT_MIN"), kv.get("GAIN_MIN"))
+        except ValueError as e:
+            return {"ok": False, "erro": str(e)}
+        payload = state.recompute()
+        res = {**state.tracker.stats(), "assert_min": payload.get("assert_min"),
+               "gain_min": payload.get("gain_min"), "total_sinais": payload.get("total_sinais")}
+    else:
+        return {"ok": False, "erro": f"comando desconhecido: {cmd}"}
+
+    return {"ok": True, "ms": round((time.perf_counter() - t0) * 1000.0, 2), **res}
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self):
+        line = self.rfile.readline(4096).decode("utf-8", errors="ignore")
+        try:
+            res = handle_command(self.server.state, line)
+        except Exception as e:
+            res = {"ok": False, "erro": str(e)}
+        self.wfile.write((json.dumps(res, ensure_ascii=False) + "\n").encode("utf-8"))
+
+class _Server(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+def serve(path: str, state):
+    # sobe em thread daemon: o ciclo agendado/por evento continua no thread principal
+    if os.path.exists(path):
+        os.remove(path)
+    srv = _Server(path, _Handler)
+    os.chmod(path, 0o600)
+    srv.state = state
+    threading.Thread(target=srv.serve_forever, name="mfe-ctl", daemon=True).start()
+    return srv
+
+def send(line: str, path: str = None, timeout: float = 10.0) -> dict:
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as s:
+        s.settimeout(timeout)
+        s.connect(path or CTL_SOCK)
+        s.sendall((line.strip() + "\n").encode("utf-8"))
+        buf = b""
+        while not buf.endswith(b"\n"):
+            chunk = s.recv(65536)
+            if not chunk:
+                break
+            buf += chunk
+    return json.loads(buf.decode("utf-8"))
+
+if __name__ == "__main__":
+    res = send(" ".join(sys.argv[1:]) or "stats")
+    print(json.dumps(res, ensure_ascii=False, indent=2))
+    sys.exit(0 if res.get("ok") else 1)
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Motor multi-timeframe: gera sinais de vários timeframes (ex.: 1d, 4h, 1h)
+# sobre o mesmo universo, num processo só.
+#   - cada timeframe tem agenda própria: recalcula uma vez por candle fechado
+#     (1h de hora em hora, 4h a cada 4h, 1d uma vez por dia; fronteiras em UTC)
+#   - estado compartilhado: preços (com sanity) lidos uma vez por rodada e
+#     estudos em cache por assinatura do CSV (dois timeframes no mesmo CSV = 1 leitura)
+#   - cada timeframe publica o próprio arquivo; 1d continua em entrada.json
+#
+# Config:
+#   MFE_TIMEFRAMES="1d,4h,1h"
+#   MFE_CSV_4H=/.../mfe_estudos_4h.csv        (padrão: mfe_estudos_<tf>.csv ao lado do MFE_CSV)
+#   ENTRADA_JSON_4H=/.../entrada_4h.json      (padrão: entrada_<tf>.json ao lado do ENTRADA_JSON)
+#
+#   python3 mfe_engine.py           # residente, dorme até o próximo candle
+#   python3 mfe_engine.py --once    # roda todos os timeframes uma vez
+
+import os, sys, time
+
+import worker_mfe as w
+
+TIMEFRAMES = [t.strip().lower() for t in os.environ.get("MFE_TIMEFRAMES", "1d").split(",") if t.strip()]
+MAX_SLEEP = float(os.environ.get("MFE_ENGINE_MAX_SLEEP", "60"))
+
+UNITS = {"m": 60, "h": 3600, "d": 86400, "w": 604800}
+
+def tf_seconds(tf: str) -> int:
+    try:
+        return int(tf[:-1]) * UNITS[tf[-1]]
+    except (KeyError, ValueError):
+        raise RuntimeError(f"timeframe inválido: {tf}")
+
+def _sibling(path: str, stem: str, tf: str, ext: str) -> str:
+    return os.path.join(os.path.dirname(path) or ".", f"{stem}_{tf}{ext}")
+
+def csv_for(tf: str) -> str:
+    if tf == "1d":
+        return os.environ.get("MFE_CSV_1D", w.CSV_PATH)
+    return os.environ.get(f"MFE_CSV_{tf.upper()}", _sibling(w.CSV_PATH, "mfe_estudos", tf, ".csv"))
+
+def out_for(tf: str) -> str:
+    if tf == "1d":
+        return w.OUT_JSON
+    return os.environ.get(f"ENTRADA_JSON_{tf.upper()}", _sibling(w.OUT_JSON, "entrada", tf, ".json"))
+
+class Shared:
+    # estado compartilhado entre timeframes; estudos e preços ficam no cache LRU
+    # (mfe_cache) por assinatura do arquivo: despejados, são relidos sob demanda
+    def __init__(self):
+        import mfe_cache
+        self.cache = mfe_cache.shared()
+        self.sanity = None
+        if w.PRICE_SANITY:
+            import mfe_sanity
+            self.sanity = mfe_sanity.PriceSanity()
+
+    def prices(self):
+        import mfe_watch
+        sig = mfe_watch.file_sig(w.PRICES_PATH)
+        # mesmo arquivo de preços: não repassa pelo sanity (não conta duas vezes o mesmo tick),
+        # mas a idade é refeita a cada leitura: arquivo parado envelhece e vira VELHO
+        ok, quar = self.cache.get_or_build(("precos", w.PRICES_PATH, sig), lambda: w.load_prices_checked(self.sanity))
+        if self.sanity is None:
+            return ok, quar
+        import mfe_sanity
+        stamps = self.cache.get_or_build(("precos_ts", w.PRICES_PATH, sig),
+                                         lambda: mfe_sanity.load_price_stamps(w.PRICES_PATH, ok))
+        return mfe_sanity.expire(ok, quar, stamps)
+
+    def estudos_for(self, csv_path: str):
+        import mfe_watch
+        sig = mfe_watch.file_sig(csv_path)
+        return self.cache.get_or_build(("estudos", csv_path, sig), lambda: w.load_estudos_any(csv_path))
+
+class TimeframeEngine:
+    def __init__(self, tf: str):
+        self.tf = tf
+        self.period = tf_seconds(tf)
+        self.csv_path = csv_for(tf)
+        self.out_path = out_for(tf)
+        self.tracker = w.ParTracker()
+        self.last_bucket = None
+
+    def bucket(self, now: float) -> int:
+        return int(now // self.period)
+
+    def due(self, now: float) -> bool:
+        return self.last_bucket != self.bucket(now)
+
+    def next_due(self, now: float) -> float:
+        return (self.bucket(now) + 1) * self.period
+
+    def run(self, shared: Shared, prices: dict, quarentena: dict, now: float) -> dict:
+        estudos, esc = shared.estudos_for(self.csv_path)
+        payload = w.build_output(prices, estudos, esc, self.tracker, quarentena, persist=(self.tf == "1d"))
+        payload["timeframe"] = self.tf
+        w.publish(w.allocate(payload), self.out_path)
+        self.last_bucket = self.bucket(now)
+        st = self.tracker.stats()
+        print(f"[OK] {self.tf}: {payload.get('ultima_atualizacao')} | Recalculados: {st['recalculados']} "
+              f"| Reaproveitados: {st['reaproveitados']} | Total sinais: {payload.get('total_sinais')} -> {self.out_path}")
+        return payload
+
+def run(once: bool = False):
+    shared = Shared()
+    engines = [TimeframeEngine(tf) for tf in TIMEFRAMES]
+    while True:
+        now = time.time()
+        due = engines if once else [e for e in engines if e.due(now)]
+        if due:
+            prices, quarentena = shared.prices()  # uma leitura para todos os timeframes
+            for e in due:
+                try:
+                    e.run(shared, prices, quarentena, now)
+                except Exception as ex:
+                    # timeframe sem CSV/linhas não derruba os outros
+                    print(f"[ERRO] {e.tf}: {ex}")
+        if once:
+            return
+        wake = min(e.next_due(now) for e in engines)
+        time.sleep(max(1.0, min(MAX_SLEEP, wake - time.time())))
+
+if __name__ == "__main__":
+    run(once="--once" in sys.argv[1:])
@@ -1,11 +1,28 @@
 #!/usr/bin/env python3
-import os, json, time, re, urllib.request
+# urllib.request puxa http/ssl (~50 ms): só importa quando for buscar preço
+import os, json, time, math
+
+HEX = set("0123456789ABCDEF")
 
 INPUT_JSON  = os.environ.get("OUTPUT_JSON", "/home/roteiro_ds/ENTRADA-MFE/entrada.json")
 COINS_FILE  = os.environ.get("MFE_COINS_FILE", "/home/roteiro_ds/ENTRADA-MFE/coins_77.txt")
 TOP10_JSON  = os.environ.get("TOP10_JSON", "/home/roteiro_ds/ENTRADA-MFE/top10.json")
+SHM_PATH    = os.environ.get("ENTRADA_SHM", "")  # opcional: republica o snapshot final no mmap
+COMPRESS    = os.environ.get("MFE_COMPRESS", "") # opcional: "gz,br" -> irmãos pré-comprimidos (mfe_publish)
+
+MAX_COINS = 200  # trava anti-explosão (por instância; no modo sharded vale por shard)
+
+# modo sharded (mfe_shard): esta instância cuida só da sua fatia do universo
+SHARDS      = int(os.environ.get("MFE_SHARDS", "1"))
+SHARD_INDEX = int(os.environ.get("MFE_SHARD_INDEX", "0"))
 
-MAX_COINS = 200  # trava anti-explosão
+# TOP10 diversificado (mfe_corr): pula sinal cuja posição tem correlação > MAX_CORR com um já escolhido
+TOP_DIVERSIFY = os.environ.get("MFE_TOP_DIVERSIFY", "0") == "1"
+TOP_MAX_CORR  = float(os.environ.get("MFE_TOP_MAX_CORR", "0.7"))
+# ranking do TOP10: "ganho" (ganho_pct, maior primeiro) ou "prazo" (prazo_dias, menor primeiro)
+TOP_RANK      = os.environ.get("MFE_TOP_RANK", "ganho").strip().lower()
+# prazo estimado até o alvo (mfe_prazo, precisa do cache OHLCV); ligado sozinho com MFE_TOP_RANK=prazo
+PRAZO         = os.environ.get("MFE_PRAZO", "0") == "1" or TOP_RANK == "prazo"
 
 def is_valid_coin(s: str) -> bool:
     if not s: return False
@@ -14,7 +31,7 @@ def is_valid_coin(s: str) -> bool:
     if not s.isalnum(): return False
     if not (2 <= len(s) <= 10): return False
     if not any(ch.isalpha() for ch in s): return False   # obrigatório ter letra
-    if re.fullmatch(r"[0-9A-F]{2,10}", s): return False   # bloqueia “hex puro”
+    if all(ch in HEX for ch in s): return False          # bloqueia “hex puro”
     return True
 
 def read_coins(path):
@@ -37,6 +54,7 @@ def read_coins(path):
     return out
 
 def fetch_binance_prices():
+    import urllib.request
     url = "https://api.binance.com/api/v3/ticker/price"
     mp = {}
     try:
@@ -51,11 +69,16 @@ def fetch_binance_prices():
         pass
     return mp
 
-def atomic_write_json(path, obj):
+def atomic_write_json(path, obj, compress=True):
     d = os.path.dirname(path) or "."
     tmp = os.path.join(d, f".tmp_{int(time.time())}_{os.getpid()}.json")
-    with open(tmp, "w", encoding="utf-8") as f:
-        json.dump(obj, f, ensure_ascii=False, separators=(",",":"))
+    data = json.dumps(obj, ensure_ascii=False, separators=(",",":")).encode("utf-8")
+    if compress and COMPRESS:
+        # .gz/.br/.etag antes; o JSON entra por último (os.replace)
+        import mfe_publish
+        mfe_publish.write_siblings(path, data)
+    with open(tmp, "wb") as f:
+        f.write(data)
     os.replace(tmp, path)
 
 def now_brt_str():
@@ -68,6 +91,79 @@ def to_float(x, default=0.0):
     except Exception:
         return default
 
+def publish(data, out_rows):
+    if PRAZO:
+        import mfe_prazo
+        mfe_prazo.annotate(out_rows)
+
+    # ---- totais oficiais (uma passada; leitores usam "agregados") ----
+    import mfe_aggs
+    agg = mfe_aggs.Agregador()
+    for r in out_rows:
+        agg.add(r)
+    total_universo = agg.total
+    total_sinais_universo = agg.sinais
+    agregados = agg.result()
+
+    data["posicional"] = out_rows
+    data["total_moedas"] = total_universo
+    data["total_sinais"] = total_sinais_universo
+    data["agregados"] = agregados
+    atomic_write_json(INPUT_JSON, data)
+    if SHM_PATH:
+        import mfe_shm
+        mfe_shm.publish_json(SHM_PATH, data)
+
+    ultima = data.get("ultima_atualizacao") or ""
+    top = build_top10(out_rows, ultima, total_universo, total_sinais_universo)
+    top["agregados"] = agregados
+    atomic_write_json(TOP10_JSON, top)
+
+def build_top10(out_rows, ultima, total_universo, total_sinais_universo):
+    # ---- TOP10 profissional ----
+    sinais_validos = []
+    for r in out_rows:
+        side = str(r.get("side","")).upper()
+        preco = to_float(r.get("preco"), 0.0)
+        alvo  = to_float(r.get("alvo"), 0.0)
+        ganho = to_float(r.get("ganho_pct"), 0.0)
+
+        # entra no TOP só se for sinal real e com preço/alvo válidos
+        if side not in ("LONG","SHORT"):
+            continue
+        if preco <= 0 or alvo <= 0:
+            continue
+        if ganho <= 0:
+            continue
+
+        sinais_validos.append(r)
+
+    if TOP_RANK == "prazo":
+        # mais rápido primeiro; sem prazo vai pro fim; empate -> maior ganho
+        sinais_validos.sort(key=lambda r: (to_float(r.get("prazo_dias"), 999.0), -to_float(r.get("ganho_pct"), 0.0)))
+    else:
+        sinais_validos.sort(key=lambda r: to_float(r.get("ganho_pct"), 0.0), reverse=True)
+    if TOP_DIVERSIFY:
+        import mfe_corr
+        top10 = mfe_corr.diversify(sinais_validos, 10, TOP_MAX_CORR,
+                                   universe=[(r.get("par") or "").upper() for r in out_rows])
+    else:
+        top10 = sinais_validos[:10]
+
+    payload = {
+        "agora_brt": now_brt_str(),
+        "ultimo_calculo_brt": (ultima if isinstance(ultima,str) else ""),
+        "total_universo": total_universo,
+        "total_sinais_universo": total_sinais_universo,
+        "exibindo": len(top10),
+        "top10": top10,
+    }
+    if TOP_RANK == "prazo":
+        payload["ranking"] = "prazo"
+    if TOP_DIVERSIFY:
+        payload["max_corr"] = TOP_MAX_CORR
+    return payload
+
 def main():
     if not os.path.isfile(INPUT_JSON):
         return
@@ -82,6 +178,9 @@ def main():
         return
 
     coins = read_coins(COINS_FILE)
+    if SHARDS > 1:
+        import mfe_shard
+        coins = mfe_shard.coins_for(coins, SHARD_INDEX, SHARDS)
     if len(coins) > MAX_COINS:
         print(f"[WARN] coins_file explosivo: {len(coins)} > {MAX_COINS}. Mantendo JSON atual.")
         return
@@ -98,15 +197,24 @@ def main():
         calc_data = ultima[0:10]
         calc_hora = ultima[11:16]
 
+    motivos = {}  # PAR -> motivo do fallback (antes caía em 0.0 sem registro)
+    quarentena = data.get("quarentena") or {}  # PAR -> motivo (mfe_sanity do worker)
+
     def price_for(coin, fallback=0.0):
         sym = f"{coin}USDT"
         p = prices.get(sym)
         if p is None:
+            motivos[coin] = "SEM_PRECO_BINANCE" if prices else "BINANCE_INDISPONIVEL"
             return fallback
         try:
-            return float(p)
+            v = float(p)
         except Exception:
+            motivos[coin] = "INVALIDO"
             return fallback
+        if not math.isfinite(v) or v <= 0:
+            motivos[coin] = "INVALIDO"
+            return fallback
+        return v
 
     out_rows = []
     if coins:
@@ -119,8 +227,13 @@ def main():
             it["side"] = side
 
             cur = to_float(it.get("preco"), 0.0)
-            if cur <= 0:
+            if cur <= 0 and c not in quarentena:
+                # preço que o worker recusou (quarentena) não é reposto pela Binance
                 cur = price_for(c, 0.0)
+                if cur > 0:
+                    it.pop("preco_motivo", None)
+            if cur <= 0:
+                it.setdefault("preco_motivo", quarentena.get(c) or motivos.get(c, "SEM_PRECO"))
             it["preco"] = cur
 
             it.setdefault("alvo", 0.0)
@@ -137,48 +250,17 @@ def main():
             out_rows.append(it)
 
         out_rows.sort(key=lambda x: (x.get("par","") or ""))
-    else:
+    elif SHARDS <= 1:
         out_rows = base_list
 
-    # ---- totais oficiais ----
-    total_universo = len(out_rows)
-    total_sinais_universo = sum(1 for r in out_rows if str(r.get("side","")).upper() in ("LONG","SHORT"))
-
-    data["posicional"] = out_rows
-    data["total_moedas"] = total_universo
-    data["total_sinais"] = total_sinais_universo
-    atomic_write_json(INPUT_JSON, data)
-
-    # ---- TOP10 profissional ----
-    sinais_validos = []
-    for r in out_rows:
-        side = str(r.get("side","")).upper()
-        preco = to_float(r.get("preco"), 0.0)
-        alvo  = to_float(r.get("alvo"), 0.0)
-        ganho = to_float(r.get("ganho_pct"), 0.0)
-
-        # entra no TOP só se for sinal real e com preço/alvo válidos
-        if side not in ("LONG","SHORT"):
-            continue
-        if preco <= 0 or alvo <= 0:
-            continue
-        if ganho <= 0:
-            continue
-
-        sinais_validos.append(r)
-
-    sinais_validos.sort(key=lambda r: to_float(r.get("ganho_pct"), 0.0), reverse=True)
-    top10 = sinais_validos[:10]
+    if SHARDS > 1:
+        # só publica a parcial; o merge (mfe_shard.py merge) monta entrada.json + TOP10
+        import mfe_shard
+        path = mfe_shard.write_partial(SHARD_INDEX, SHARDS, data, out_rows)
+        print(f"[OK] shard {SHARD_INDEX}/{SHARDS}: {len(out_rows)} moedas -> {path}")
+        return
 
-    payload = {
-        "agora_brt": now_brt_str(),
-        "ultimo_calculo_brt": (ultima if isinstance(ultima,str) else ""),
-        "total_universo": total_universo,
-        "total_sinais_universo": total_sinais_universo,
-        "exibindo": len(top10),
-        "top10": top10,
-    }
-    atomic_write_json(TOP10_JSON, payload)
+    publish(data, out_rows)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Gera o mfe_estudos.csv (PAR;LADO;PERCENTIL;ALVO_PCT) direto do cache OHLCV
+# (mfe_ohlcv), sem esperar o export do autotrader-planilhas-python.
+#
+# Para cada candle fechado t com t+HOLD disponível:
+#   LONG : MFE = max(high[t+1..t+HOLD]) / close[t] - 1
+#   SHORT: MFE = 1 - min(low[t+1..t+HOLD]) / close[t]
+# max/min da janela por deque monotônica: O(n) por moeda, sem reordenar a janela.
+#
+# Uma linha calibrada por PAR/LADO. Para cada alvo da grade MFE_GEN_ALVOS (% do
+# preço) a taxa de acerto empírica é a fração das entradas com MFE >= alvo; sai o
+# alvo de maior ALVO_PCT*acerto (o score do worker) entre os com acerto >= ASSERT_MIN,
+# com PERCENTIL = essa taxa (%). Sem alvo que chegue ao corte sai o menor alvo com
+# a taxa que ele tiver (o worker filtra). Assim o PERCENTIL é a assertividade real
+# de cada moeda: o filtro ASSERT_MIN e a zona/risco do worker continuam valendo.
+# (Uma escada de percentis fixos não serve: o score é máximo no percentil mais
+# baixo da escada e toda moeda sairia com o mesmo PERCENTIL.)
+#
+# Modo incremental (MFE_GEN_STATE=<arquivo>): guarda por PAR/LADO um sketch de
+# quantis (mfe_sketch) + timestamp da última entrada processada; cada rodada só
+# calcula as entradas novas e consulta os percentis no sketch (histórico todo,
+# sem reordenar). Estados de shards diferentes se juntam com merge-state.
+#
+#   python3 mfe_estudos_gen.py            # gera a partir do cache
+#   python3 mfe_estudos_gen.py --fetch    # atualiza o cache antes (Binance)
+#   python3 mfe_estudos_gen.py merge-state saida.state a.state b.state
+
+import os, sys, time, struct
+from collections import deque
+
+TF = os.environ.get("MFE_GEN_TF", "1d")
+HOLD = int(os.environ.get("MFE_GEN_HOLD", "14"))           # horizonte em candles (legado: 14 dias)
+LOOKBACK = int(os.environ.get("MFE_GEN_LOOKBACK", "365"))  # entradas usadas por moeda
+MIN_OBS = int(os.environ.get("MFE_GEN_MIN_OBS", "30"))     # legado: total >= 30
+ASSERT_MIN = float(os.environ.get("ASSERT_MIN", "65"))     # mesmo corte do worker_mfe
+
+ALVOS = sorted({float(x) for x in os.environ.get(
+    "MFE_GEN_ALVOS", "1,1.5,2,2.5,3,4,5,6,7,8,10,12,15,20,25,30").split(",") if x.strip()})
+STATE_PATH = os.environ.get("MFE_GEN_STATE", "")           # vazio = recalcula tudo a cada rodada
+OUT_CSV = os.environ.get("MFE_GEN_OUT", "") or os.environ.get("MFE_CSV", "/home/roteiro_ds/autotrader-planilhas-python/data/mfe_estudos.csv")
+
+def window_extreme(values, w: int, use_max: bool):
+    # out[j] = max/min(values[j..j+w-1]) para j em 0..n-w
+    out, dq = [], deque()
+    for i, v in enumerate(values):
+        if use_max:
+            while dq and values[dq[-1]] <= v:
+                dq.pop()
+        else:
+            while dq and values[dq[-1]] >= v:
+                dq.pop()
+        dq.append(i)
+        if dq[0] <= i - w:
+            dq.popleft()
+        if i >= w - 1:
+            out.append(values[dq[0]])
+    return out
+
+def excursions(closes, highs, lows, hold: int = HOLD, lookback: int = LOOKBACK):
+    # (mfe_long, mfe_short) em % para as últimas `lookback` entradas completas
+    n = len(closes)
+    if n <= hold:
+        return [], []
+    hmax = window_extreme(highs, hold, True)   # hmax[j] = max(highs[j..j+hold-1])
+    lmin = window_extreme(lows, hold, False)
+    first = max(0, n - hold - lookback)
+    longs, shorts = [], []
+    for t in range(first, n - hold):
+        c = closes[t]
+        if not c or c <= 0:
+            continue
+        longs.append(max(0.0, (hmax[t + 1] / c - 1.0) * 100.0))
+        shorts.append(max(0.0, (1.0 - lmin[t + 1] / c) * 100.0))
+    return longs, shorts
+
+def calibrate(hit_of, alvos=None, cut: float = None):
+    # (PERCENTIL, ALVO_PCT): hit_of(alvo) = fração das entradas com MFE >= alvo
+    alvos = alvos or ALVOS
+    cut = ASSERT_MIN if cut is None else cut
+    best = None
+    for a in alvos:
+        h = 100.0 * hit_of(a)
+        if h >= cut and (best is None or a * h > best[1] * best[0]):
+            best = (h, a)
+    if best is None:
+        best = (100.0 * hit_of(alvos[0]), alvos[0])
+    return round(best[0], 1), best[1]
+
+def study_rows(par: str, lado: str, mfe, alvos=None):
+    from bisect import bisect_left
+    vals = sorted(mfe)
+    n = len(vals)
+    p, alvo = calibrate(lambda a: (n - bisect_left(vals, a)) / n, alvos)
+    return [(par, lado, p, alvo)]
+
+def generate(coins, tf: str = TF):
+    import mfe_ohlcv
+    rows, sem_dados = [], []
+    for par in coins:
+        candles = mfe_ohlcv.load(par, tf)
+        closes, highs, lows = mfe_ohlcv.columns(candles)
+        longs, shorts = excursions(closes, highs, lows)
+        if len(longs) < MIN_OBS:
+            sem_dados.append(par)
+            continue
+        rows += study_rows(par, "LONG", longs)
+        rows += study_rows(par, "SHORT", shorts)
+    return rows, sem_dados
+
+# ---- incremental (sketch por PAR/LADO) ----
+STATE_MAGIC = b"MFS1"
+
+def load_state(path: str) -> dict:
+    # PAR -> [ultimo_ts, sketch LONG, sketch SHORT]
+    import mfe_sketch
+    try:
+        with open(path, "rb") as f:
+            buf = f.read()
+    except FileNotFoundError:
+        return {}
+    if buf[:4] != STATE_MAGIC:
+        raise RuntimeError(f"estado inválido: {path}")
+    (count,) = struct.unpack_from("<I", buf, 4)
+    off, state = 8, {}
+    for _ in range(count):
+        (ln,) = struct.unpack_from("<H", buf, off)
+        par = buf[off + 2:off + 2 + ln].decode("utf-8")
+        (last_ts,) = struct.unpack_from("<q", buf, off + 2 + ln)
+        off += 2 + ln + 8
+        sl, off = mfe_sketch.KLLSketch.from_bytes(buf, off)
+        ss, off = mfe_sketch.KLLSketch.from_bytes(buf, off)
+        state[par] = [last_ts, sl, ss]
+    return state
+
+def save_state(path: str, state: dict):
+    parts = [STATE_MAGIC, struct.pack("<I", len(state))]
+    for par in sorted(state):
+        last_ts, sl, ss = state[par]
+        b = par.encode("utf-8")
+        parts += [struct.pack("<H", len(b)), b, struct.pack("<q", int(last_ts)), sl.to_bytes(), ss.to_bytes()]
+    d = os.path.dirname(path)
+    if d:
+        os.makedirs(d, exist_ok=True)
+    tmp = f"{path}.tmp{os.getpid()}"
+    with open(tmp, "wb") as f:
+        f.write(b"".join(parts))
+    os.replace(tmp, path)
+
+def merge_states(states) -> dict:
+    # históricos disjuntos (shards/períodos diferentes) do mesmo PAR somam
+    out = {}
+    for st in states:
+        for par, (last_ts, sl, ss) in st.items():
+            cur = out.get(par)
+            if cur is None:
+                out[par] = [last_ts, sl, ss]
+            else:
+                cur[0] = max(cur[0], last_ts)
+                cur[1].merge(sl)
+                cur[2].merge(ss)
+    return out
+
+def sketch_rows(par: str, lado: str, sk, alvos=None):
+    # rank(x) = fração <= x; empate exato com o alvo é desprezível em MFE contínuo
+    p, alvo = calibrate(lambda a: 1.0 - sk.rank(a), alvos)
+    return [(par, lado, p, alvo)]
+
+def generate_incremental(coins, state: dict, tf: str = TF):
+    import mfe_ohlcv, mfe_sketch
+    rows, sem_dados, novas = [], [], 0
+    for par in coins:
+        candles = mfe_ohlcv.load(par, tf)
+        st = state.get(par)
+        if st is None:
+            st = state[par] = [-1, mfe_sketch.KLLSketch(), mfe_sketch.KLLSketch()]
+        # entradas completas (t + HOLD fechado) ainda não vistas
+        done = max(0, len(candles) - HOLD)
+        new = 0
+        while new < done and candles[done - 1 - new][0] > st[0]:
+            new += 1
+        if new:
+            closes, highs, lows = mfe_ohlcv.columns(candles)
+            longs, shorts = excursions(closes, highs, lows, HOLD, new)
+            st[1].extend(longs)
+            st[2].extend(shorts)
+            st[0] = candles[done - 1][0]
+            novas += new
+        if len(st[1]) < MIN_OBS:
+            sem_dados.append(par)
+            continue
+        rows += sketch_rows(par, "LONG", st[1])
+        rows += sketch_rows(par, "SHORT", st[2])
+    return rows, sem_dados, novas
+
+def write_csv(path: str, rows):
+    d = os.path.dirname(path)
+    if d:
+        os.makedirs(d, exist_ok=True)
+    tmp = f"{path}.tmp{os.getpid()}"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write("PAR;LADO;PERCENTIL;ALVO_PCT\n")
+        for par, lado, p, alvo in rows:
+            f.write(f"{par};{lado};{p:g};{alvo:.4f}\n")
+    os.replace(tmp, path)
+
+def main():
+    args = sys.argv[1:]
+    if args and args[0] == "merge-state":
+        if len(args) < 3:
+            raise SystemExit("uso: mfe_estudos_gen.py merge-state saida entrada1 [entrada2 ...]")
+        st = merge_states(load_state(p) for p in args[2:])
+        save_state(args[1], st)
+        print(f"[OK] {args[1]} | {len(st)} pares")
+        return
+    import mfe_enrich
+    coins = mfe_enrich.read_coins(mfe_enrich.COINS_FILE)
+    if "--fetch" in args:
+        import mfe_ohlcv
+        mfe_ohlcv.update_all(coins, TF)
+    t0 = time.perf_counter()
+    extra = ""
+    if STATE_PATH:
+        state = load_state(STATE_PATH)
+        rows, sem_dados, novas = generate_incremental(coins, state)
+        save_state(STATE_PATH, state)
+        extra = f" | entradas novas {novas}"
+    else:
+        rows, sem_dados = generate(coins)
+    if not rows:
+        raise SystemExit("[ERRO] nenhum estudo gerado (cache OHLCV vazio?): mantendo CSV atual")
+    write_csv(OUT_CSV, rows)
+    print(f"[OK] {OUT_CSV} | {len(rows)} linhas | {len(coins) - len(sem_dados)} moedas | "
+          f"sem dados {len(sem_dados)}{extra} | {(time.perf_counter() - t0) * 1000:.0f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Cache local de candles (OHLCV) por PAR/timeframe, só candles fechados.
+# Arquivo: <MFE_OHLCV_DIR>/<PAR>_<tf>.json = [[ts_ms, o, h, l, c, v], ...]
+# Atualização incremental pela API pública da Binance (klines), sem ccxt.
+# Leitura passa pelo cache LRU do processo (mfe_cache) por assinatura do arquivo.
+#
+#   python3 mfe_ohlcv.py update [1d]     # atualiza o cache das moedas do MFE_COINS_FILE
+
+import os, sys, json, time
+
+OHLCV_DIR = os.environ.get("MFE_OHLCV_DIR", "/home/roteiro_ds/ENTRADA-MFE/ohlcv")
+KEEP = int(os.environ.get("MFE_OHLCV_KEEP", "1000"))   # candles guardados por PAR/tf
+KLINES_URL = "https://api.binance.com/api/v3/klines"
+
+def path_for(par: str, tf: str) -> str:
+    return os.path.join(OHLCV_DIR, f"{par.upper()}_{tf}.json")
+
+def _read(path: str):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except Exception:
+        return []
+    return data if isinstance(data, list) else []
+
+def sig(par: str, tf: str = "1d"):
+    # assinatura do arquivo (None se não existe): quem deriva algo dos candles
+    # pode memorizar por ela sem reler o arquivo
+    import mfe_watch
+    return mfe_watch.file_sig(path_for(par, tf))
+
+def load(par: str, tf: str = "1d"):
+    # lista de candles (pode ser vazia); em cache enquanto o arquivo não muda
+    import mfe_cache
+    path = path_for(par, tf)
+    s = sig(par, tf)
+    if s is None:
+        return []
+    return mfe_cache.shared().get_or_build(("ohlcv", par.upper(), tf, s), lambda: _read(path))
+
+def columns(candles):
+    # (closes, highs, lows) como listas de float
+    return [c[4] for c in candles], [c[2] for c in candles], [c[3] for c in candles]
+
+def fetch_klines(par: str, tf: str = "1d", start_ms: int = None, limit: int = 1000):
+    import urllib.request, urllib.parse
+    q = {"symbol": f"{par.upper()}USDT", "interval": tf, "limit": limit}
+    if start_ms:
+        q["startTime"] = int(start_ms)
+    with urllib.request.urlopen(f"{KLINES_URL}?{urllib.parse.urlencode(q)}", timeout=15) as r:
+        raw = json.loads(r.read().decode("utf-8"))
+    now_ms = time.time() * 1000
+    out = []
+    for k in raw:
+        if float(k[6]) > now_ms:
+            continue  # candle ainda aberto
+        out.append([int(k[0]), float(k[1]), float(k[2]), float(k[3]), float(k[4]), float(k[5])])
+    return out
+
+def update(par: str, tf: str = "1d") -> int:
+    # busca só o que falta depois do último candle salvo; devolve quantos entraram
+    path = path_for(par, tf)
+    old = _read(path)
+    start = old[-1][0] + 1 if old else None
+    new = fetch_klines(par, tf, start)
+    if not new:
+        return 0
+    seen = {c[0] for c in old}
+    merged = old + [c for c in new if c[0] not in seen]
+    merged = merged[-KEEP:]
+    os.makedirs(OHLCV_DIR, exist_ok=True)
+    tmp = f"{path}.tmp{os.getpid()}"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(merged, f, separators=(",", ":"))
+    os.replace(tmp, path)
+    return len(merged) - len(old)
+
+def update_all(coins, tf: str = "1d") -> dict:
+    res = {}
+    for c in coins:
+        try:
+            res[c] = update(c, tf)
+        except Exception as e:
+            res[c] = f"ERRO: {e}"
+    return res
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    if not args or args[0] != "update":
+        raise SystemExit("uso: mfe_ohlcv.py update [tf]")
+    import mfe_enrich
+    tf = args[1] if len(args) > 1 else "1d"
+    res = update_all(mfe_enrich.read_coins(mfe_enrich.COINS_FILE), tf)
+    erros = {k: v for k, v in res.items() if isinstance(v, str)}
+    print(f"[OK] ohlcv {tf}: {len(res) - len(erros)} moedas | {sum(v for v in res.values() if isinstance(v, int))} candles novos | erros {len(erros)}")
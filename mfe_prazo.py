@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Prazo estimado até o alvo (dias), em lote para todas as linhas LONG/SHORT.
+#
+# prazo_dias (mesma regra do estimar_prazo_dias do worker antigo):
+#   distância até o alvo (% do preço) / ATR% de 14 candles, limitado a 1..30.
+# prazo_pXX_dias: tempo até o alvo ser tocado com probabilidade XX% num passeio
+#   aleatório sem tendência com volatilidade σ (desvio dos retornos log):
+#   P(toque até T) = 2·(1 - Φ(d / (σ·√T)))  =>  T = (d / (σ·Φ⁻¹(1 - q/2)))²
+#   também limitado a 1..30 (30 = "30 ou mais").
+# Volatilidade por PAR vem do cache OHLCV (mfe_ohlcv) e fica no cache LRU do
+# processo (mfe_cache) com a assinatura do arquivo de candles na chave: só é
+# recalculada quando o arquivo muda.
+# Com MFE_PRAZO_TF diferente de 1d as contas saem em candles e são convertidas
+# para dias pela duração do candle (4h = 1/6 dia) antes do limite 1..30.
+
+import os, math
+
+TF = os.environ.get("MFE_PRAZO_TF", "1d")
+ATR_LEN = 14
+VOL_LEN = int(os.environ.get("MFE_PRAZO_VOL_LEN", "30"))   # retornos para σ
+PRAZO_Q = float(os.environ.get("MFE_PRAZO_Q", "0.5"))      # probabilidade do percentil publicado
+DIAS_MIN, DIAS_MAX = 1, 30
+TF_UNIT_DIAS = {"m": 1.0 / 1440, "h": 1.0 / 24, "d": 1.0, "w": 7.0, "M": 30.0}   # intervalos da Binance
+
+def tf_dias(tf: str) -> float:
+    # duração de um candle em dias ("4h" -> 0.1667)
+    try:
+        return int(tf[:-1]) * TF_UNIT_DIAS[tf[-1]]
+    except (ValueError, KeyError, IndexError):
+        raise ValueError(f"timeframe inválido: {tf!r}") from None
+
+def vol_for(par: str, tf: str = TF):
+    # (atr_pct, sigma) do PAR ou (None, None) sem histórico suficiente
+    import mfe_ohlcv, mfe_cache
+    sig = mfe_ohlcv.sig(par, tf)
+    if sig is None:
+        return None, None
+    return mfe_cache.shared().get_or_build(("prazo_vol", par, tf, sig), lambda: _vol(mfe_ohlcv.load(par, tf)))
+
+def _vol(candles):
+    if len(candles) < ATR_LEN + 2:
+        return None, None
+    tail = candles[-(ATR_LEN + 1):]
+    trs = []
+    for prev, c in zip(tail, tail[1:]):
+        pc = prev[4]
+        trs.append(max(c[2] - c[3], abs(c[2] - pc), abs(c[3] - pc)))
+    last = tail[-1][4]
+    atr_pct = (sum(trs) / len(trs)) / last * 100.0 if last > 0 else None
+    closes = [c[4] for c in candles[-(VOL_LEN + 1):] if c[4] > 0]
+    rets = [math.log(b / a) for a, b in zip(closes, closes[1:])]
+    sigma = None
+    if len(rets) >= 2:
+        m = sum(rets) / len(rets)
+        sigma = math.sqrt(sum((r - m) ** 2 for r in rets) / (len(rets) - 1))
+    return atr_pct, sigma
+
+def _clamp(d: float) -> float:
+    return round(min(DIAS_MAX, max(DIAS_MIN, d)), 1)
+
+def q_field(q: float = PRAZO_Q) -> str:
+    return f"prazo_p{int(round(q * 100))}_dias"
+
+def annotate(rows, q: float = PRAZO_Q, tf: str = TF) -> int:
+    # grava prazo_dias / prazo_pXX_dias nas linhas LONG/SHORT; devolve quantas receberam
+    from statistics import NormalDist
+    z = NormalDist().inv_cdf(1.0 - q / 2.0)
+    dias = tf_dias(tf)
+    field = q_field(q)
+    n = 0
+    for r in rows:
+        if str(r.get("side", "")).upper() not in ("LONG", "SHORT"):
+            continue
+        try:
+            preco, alvo = float(r.get("preco")), float(r.get("alvo"))
+        except (TypeError, ValueError):
+            continue
+        if preco <= 0 or alvo <= 0:
+            continue
+        atr_pct, sigma = vol_for((r.get("par") or "").upper(), tf)
+        if atr_pct:
+            r["prazo_dias"] = _clamp(abs(alvo - preco) / preco * 100.0 / atr_pct * dias)
+            n += 1
+        if sigma and z > 0:
+            r[field] = _clamp((abs(math.log(alvo / preco)) / (sigma * z)) ** 2 * dias)
+    return n
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Irmãos pré-comprimidos dos JSONs publicados (entrada.json, top10.json):
+#   <arquivo>.gz, <arquivo>.br (se o módulo brotli existir) e <arquivo>.etag
+#   (manifesto com o etag, sha256 truncado, do JSON e de cada variante).
+# Ordem da publicação: irmãos + manifesto primeiro, JSON por último (os.replace).
+# Quem serve confere `etag.json` do manifesto contra o etag do JSON atual (o
+# server.js refaz o hash só quando mtime/tamanho do arquivo mudam): se não bate,
+# a publicação está no meio (ou o JSON foi regravado sem irmãos) e serve o JSON cru.
+#
+# MFE_COMPRESS="gz,br"   (vazio = desligado)
+# Níveis: bench_compress.py. gzip 8 dá o mesmo tamanho do 9 (~10% do JSON em
+# 1k/10k linhas) com menos CPU; o custo é por publicação (a cada ciclo), não por
+# requisição. brotli: ajustar com o benchmark onde o módulo estiver instalado.
+
+import os, json, hashlib
+
+COMPRESS = [c.strip().lower() for c in os.environ.get("MFE_COMPRESS", "").split(",") if c.strip()]
+GZIP_LEVEL = int(os.environ.get("MFE_GZIP_LEVEL", "8"))
+BR_QUALITY = int(os.environ.get("MFE_BR_QUALITY", "9"))
+
+def gzip_bytes(data: bytes, level: int = None) -> bytes:
+    import gzip
+    # mtime=0: mesma entrada -> mesmos bytes (ETag estável)
+    return gzip.compress(data, compresslevel=GZIP_LEVEL if level is None else level, mtime=0)
+
+def brotli_bytes(data: bytes, quality: int = None):
+    try:
+        import brotli
+    except ImportError:
+        return None
+    return brotli.compress(data, quality=BR_QUALITY if quality is None else quality)
+
+def etag(data: bytes) -> str:
+    return '"' + hashlib.sha256(data).hexdigest()[:32] + '"'
+
+def _write_atomic(path: str, data: bytes):
+    tmp = f"{path}.tmp{os.getpid()}"
+    try:
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+def write_siblings(path: str, data: bytes, kinds=None) -> dict:
+    # grava .gz/.br/.etag de `path`; o chamador grava o JSON depois
+    kinds = COMPRESS if kinds is None else kinds
+    manifest = {"etag": {"json": etag(data)}}
+    for k in kinds:
+        if k == "gz":
+            z = gzip_bytes(data)
+        elif k == "br":
+            z = brotli_bytes(data)
+            if z is None:
+                continue  # brotli não instalado: só gzip
+        else:
+            continue
+        _write_atomic(f"{path}.{k}", z)
+        manifest["etag"][k] = etag(z)
+    _write_atomic(f"{path}.etag", json.dumps(manifest, separators=(",", ":")).encode("utf-8"))
+    return manifest
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Validação do vetor de preços antes do cálculo (uma passada, O(universo)):
+#   - INVALIDO : não numérico, NaN/inf ou <= 0
+#   - VELHO    : idade do preço acima de MFE_PRICE_MAX_AGE segundos
+#   - SALTO    : variação contra o último preço aceito acima de MFE_PRICE_MAX_JUMP_PCT
+#   - OUTLIER  : retorno fora de K * MAD (janela móvel de retornos do próprio PAR)
+# Símbolo suspeito fica em quarentena (preço removido -> NÃO ENTRAR) com o motivo.
+# Um salto que se repete por MFE_PRICE_CONFIRM ciclos seguidos é aceito (mudança real).
+
+import os, json, math, time
+from collections import deque
+
+MAX_JUMP_PCT = float(os.environ.get("MFE_PRICE_MAX_JUMP_PCT", "35"))
+MAD_K        = float(os.environ.get("MFE_PRICE_MAD_K", "10"))
+MAD_WINDOW   = int(os.environ.get("MFE_PRICE_MAD_WINDOW", "30"))
+MAD_MIN_N    = 8
+MAX_AGE_S    = float(os.environ.get("MFE_PRICE_MAX_AGE", "1800"))   # 0 = não checa idade
+CONFIRM      = int(os.environ.get("MFE_PRICE_CONFIRM", "3"))
+# histórico entre execuções (modo timer); padrão ao lado do MFE_PRICES_JSON, vazio desliga
+STATE_PATH   = os.environ.get("MFE_SANITY_STATE", os.path.join(os.path.dirname(
+    os.environ.get("MFE_PRICES_JSON", "/home/roteiro_ds/ENTRADA-MFE/precos_cache.json")), "precos_sanity.json"))
+
+TS_KEYS = ("ts", "timestamp", "updated_at", "atualizado_em")
+
+def _epoch(x):
+    try:
+        v = float(x)
+    except Exception:
+        return None
+    return v / 1000.0 if v > 1e11 else v  # aceita ms
+
+def load_price_stamps(path: str, pars) -> dict:
+    # instante (epoch) de cada preço: ts por símbolo ({"ts": {"BTC": ...}}), ts global ou mtime do arquivo
+    try:
+        mtime = os.path.getmtime(path)
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except Exception:
+        return {}
+    glob, per = mtime, {}
+    if isinstance(data, dict):
+        for k in TS_KEYS:
+            v = data.get(k)
+            if isinstance(v, dict):
+                per = {str(kk).upper(): _epoch(vv) for kk, vv in v.items()}
+                break
+            e = _epoch(v) if v is not None else None
+            if e:
+                glob = e
+                break
+    return {p: per.get(p) or glob for p in pars}
+
+def load_price_ages(path: str, pars, now: float = None) -> dict:
+    # idade (s) por PAR
+    now = time.time() if now is None else now
+    return {p: now - ts for p, ts in load_price_stamps(path, pars).items()}
+
+def expire(prices: dict, quarentena: dict, stamps: dict, now: float = None):
+    # reaplica só o limite de idade a um vetor já checado (preço guardado em
+    # cache envelhece sem o arquivo mudar); devolve cópias (preços, quarentena)
+    if MAX_AGE_S <= 0:
+        return prices, quarentena
+    now = time.time() if now is None else now
+    velhos = {p for p in prices if stamps.get(p) is not None and now - stamps[p] > MAX_AGE_S}
+    if not velhos:
+        return prices, quarentena
+    quar = dict(quarentena)
+    quar.update((p, "VELHO") for p in velhos)
+    return {p: v for p, v in prices.items() if p not in velhos}, quar
+
+def _median(xs):
+    s = sorted(xs)
+    n = len(s)
+    m = n // 2
+    return s[m] if n % 2 else 0.5 * (s[m - 1] + s[m])
+
+class PriceSanity:
+    def __init__(self):
+        self.prev = {}     # PAR -> último preço aceito
+        self.hist = {}     # PAR -> deque de log-retornos aceitos
+        self.pend = {}     # PAR -> (preço suspeito, repetições)
+        self.quarentena = {}
+        self.snap = None   # assinatura do último snapshot de preços checado
+
+    # ---- persistência (modo timer: cada ciclo é um processo novo) ----
+    def load(self, path: str):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                st = json.load(f)
+        except Exception:
+            return self
+        self.prev = {k: float(v) for k, v in st.get("prev", {}).items()}
+        self.hist = {k: deque(v, maxlen=MAD_WINDOW) for k, v in st.get("hist", {}).items()}
+        self.pend = {k: tuple(v) for k, v in st.get("pend", {}).items()}
+        self.quarentena = dict(st.get("quar", {}))
+        self.snap = tuple(st["snap"]) if st.get("snap") else None
+        return self
+
+    def save(self, path: str):
+        d = os.path.dirname(path) or "."
+        tmp = os.path.join(d, f".tmp_sanity_{os.getpid()}.json")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({
+                "prev": self.prev,
+                "hist": {k: [round(x, 6) for x in v] for k, v in self.hist.items()},
+                "pend": self.pend,
+                "quar": self.quarentena,
+                "snap": self.snap,
+            }, f, separators=(",", ":"))
+        os.replace(tmp, path)
+
+    def _suspeito(self, par, v, age):
+        if not isinstance(v, (int, float)) or not math.isfinite(v) or v <= 0:
+            return "INVALIDO", None
+        if MAX_AGE_S > 0 and age is not None and age > MAX_AGE_S:
+            return "VELHO", None
+        p0 = self.prev.get(par)
+        if not p0:
+            return None, None
+        r = math.log(v / p0)
+        if abs(math.expm1(r)) * 100.0 > MAX_JUMP_PCT:
+            return "SALTO", r
+        h = self.hist.get(par)
+        if h is not None and len(h) >= MAD_MIN_N:
+            med = _median(h)
+            mad = _median([abs(x - med) for x in h])
+            if mad > 0 and abs(r - med) > MAD_K * 1.4826 * mad:
+                return "OUTLIER", r
+        return None, r
+
+    def check(self, prices: dict, ages: dict = None, snap=None) -> dict:
+        # devolve só os preços aceitos; motivos ficam em self.quarentena.
+        # snap = assinatura do arquivo de preços: o mesmo snapshot relido (timer
+        # reiniciando a cada poucos segundos) não avança prev/hist/pend (senão
+        # enche a janela de retornos 0 e zera o MAD, e confirma salto sozinho);
+        # repete o veredito anterior, só com a idade reavaliada
+        ages = ages or {}
+        if snap is not None and tuple(snap) == self.snap:
+            return self._replay(prices, ages)
+        ok, quar = {}, {}
+        for par, v in prices.items():
+            motivo, r = self._suspeito(par, v, ages.get(par))
+            if motivo in ("SALTO", "OUTLIER"):
+                # mesmo valor suspeito repetido CONFIRM vezes -> aceita como novo nível
+                pv, n = self.pend.get(par, (None, 0))
+                n = n + 1 if pv and abs(v / pv - 1.0) < 0.01 else 1
+                if n >= CONFIRM:
+                    self.pend.pop(par, None)
+                    self.hist.pop(par, None)  # nível novo: recomeça a janela
+                    motivo, r = None, None
+                else:
+                    self.pend[par] = (float(v), n)
+            if motivo:
+                quar[par] = motivo
+                continue
+            self.pend.pop(par, None)
+            if r is not None:
+                self.hist.setdefault(par, deque(maxlen=MAD_WINDOW)).append(r)
+            self.prev[par] = float(v)
+            ok[par] = float(v)
+        self.quarentena = quar
+        self.snap = tuple(snap) if snap is not None else None
+        return ok
+
+    def _replay(self, prices: dict, ages: dict) -> dict:
+        ok, quar = {}, {}
+        for par, v in prices.items():
+            motivo = self.quarentena.get(par)
+            age = ages.get(par)
+            if MAX_AGE_S > 0 and age is not None and age > MAX_AGE_S:
+                motivo = "VELHO"
+            elif motivo == "VELHO":
+                motivo = None
+            if motivo or not isinstance(v, (int, float)) or not math.isfinite(v) or v <= 0:
+                quar[par] = motivo or "INVALIDO"
+                continue
+            ok[par] = float(v)
+        self.quarentena = quar
+        return ok
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Modo sharded do enrich: o universo do read_coins() é dividido por hashing
+# consistente entre N instâncias (processos ou hosts). Cada instância roda
+# mfe_enrich.py com MFE_SHARDS=N e MFE_SHARD_INDEX=i e grava uma parcial;
+# o merge junta as parciais em entrada.json + TOP10 global.
+#
+#   python3 mfe_shard.py merge [N]        # monta entrada.json/top10.json das parciais
+#   python3 mfe_shard.py run-local N      # sobe N processos locais + merge (teste)
+#   python3 mfe_shard.py show N           # mostra a divisão das moedas
+
+import os, sys, json, time, bisect, hashlib, subprocess
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+VNODES = int(os.environ.get("MFE_SHARD_VNODES", "64"))
+SHARD_DIR = os.environ.get("MFE_SHARD_DIR", "")               # padrão: pasta do entrada.json
+SHARD_MAX_AGE = float(os.environ.get("MFE_SHARD_MAX_AGE", "900"))  # parcial mais velha que isso -> não junta
+
+def _h(s: str) -> int:
+    return int.from_bytes(hashlib.md5(s.encode("utf-8")).digest()[:8], "big")
+
+_RINGS = {}
+
+def ring(n: int):
+    # anel com VNODES pontos por shard: adicionar/remover shard move ~1/N das moedas
+    r = _RINGS.get(n)
+    if r is None:
+        pts = sorted((_h(f"shard-{i}-{v}"), i) for i in range(n) for v in range(VNODES))
+        r = _RINGS[n] = ([p for p, _ in pts], [i for _, i in pts])
+    return r
+
+def shard_of(coin: str, n: int) -> int:
+    keys, owners = ring(n)
+    k = bisect.bisect(keys, _h(coin.upper())) % len(keys)
+    return owners[k]
+
+def coins_for(coins, index: int, n: int):
+    return [c for c in coins if shard_of(c, n) == index]
+
+def shard_dir() -> str:
+    import mfe_enrich
+    return SHARD_DIR or os.path.dirname(mfe_enrich.INPUT_JSON) or "."
+
+def partial_path(index: int, n: int) -> str:
+    return os.path.join(shard_dir(), f"entrada.shard{index}of{n}.json")
+
+def write_partial(index: int, n: int, data: dict, rows) -> str:
+    import mfe_enrich
+    path = partial_path(index, n)
+    mfe_enrich.atomic_write_json(path, {
+        "shard": index,
+        "shards": n,
+        "gerado_em": time.time(),
+        "ultima_atualizacao": data.get("ultima_atualizacao") or "",
+        "posicional": rows,
+    }, compress=False)
+    return path
+
+def merge(n: int) -> dict:
+    import mfe_enrich
+    parts = []
+    for i in range(n):
+        path = partial_path(i, n)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                p = json.load(f)
+        except Exception as e:
+            raise RuntimeError(f"parcial ausente/ilegível: {path} ({e})")
+        if p.get("shard") != i or p.get("shards") != n:
+            raise RuntimeError(f"parcial inconsistente: {path}")
+        if SHARD_MAX_AGE > 0 and time.time() - float(p.get("gerado_em") or 0) > SHARD_MAX_AGE:
+            raise RuntimeError(f"parcial velha: {path}")
+        parts.append(p)
+
+    # base = saída do worker (assert_min, gain_min, ultima_atualizacao...)
+    try:
+        with open(mfe_enrich.INPUT_JSON, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except Exception:
+        data = {}
+    if not data.get("ultima_atualizacao"):
+        data["ultima_atualizacao"] = max((p.get("ultima_atualizacao") or "" for p in parts), default="")
+
+    rows, seen = [], set()
+    for p in parts:
+        for r in p.get("posicional") or []:
+            par = (r.get("par") or "").upper()
+            if par and par not in seen:
+                seen.add(par)
+                rows.append(r)
+    rows.sort(key=lambda x: (x.get("par", "") or ""))
+    if not rows:
+        raise RuntimeError("parciais sem linhas: mantendo JSON atual")
+
+    mfe_enrich.publish(data, rows)
+    return data
+
+def run_local(n: int) -> int:
+    procs = []
+    for i in range(n):
+        env = dict(os.environ, MFE_SHARDS=str(n), MFE_SHARD_INDEX=str(i))
+        procs.append(subprocess.Popen([sys.executable, os.path.join(ROOT, "mfe_enrich.py")], env=env))
+    rc = max(p.wait() for p in procs)
+    if rc != 0:
+        print(f"[ERRO] algum shard falhou (rc={rc}); merge não executado")
+        return rc
+    data = merge(n)
+    print(f"[OK] merge de {n} shards: {data.get('total_moedas')} moedas | {data.get('total_sinais')} sinais")
+    return 0
+
+def main():
+    args = sys.argv[1:]
+    cmd = args[0] if args else "merge"
+    n = int(args[1]) if len(args) > 1 else int(os.environ.get("MFE_SHARDS", "1"))
+    if n < 1:
+        raise SystemExit("N precisa ser >= 1")
+    if cmd == "run-local":
+        sys.exit(run_local(n))
+    if cmd == "show":
+        import mfe_enrich
+        coins = mfe_enrich.read_coins(mfe_enrich.COINS_FILE)
+        for i in range(n):
+            part = coins_for(coins, i, n)
+            print(f"shard {i}: {len(part)} | {' '.join(part)}")
+        return
+    if cmd == "merge":
+        data = merge(n)
+        print(f"[OK] merge de {n} shards: {data.get('total_moedas')} moedas | {data.get('total_sinais')} sinais")
+        return
+    raise SystemExit(f"comando desconhecido: {cmd}")
+
+if __name__ == "__main__":
+    main()
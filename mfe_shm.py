@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Publicação do último snapshot num arquivo mapeado em memória (estilo seqlock).
+#
+# Layout (little-endian, 64 bytes de header + dados):
+#   0  magic   4s   b"MFE1"
+#   4  versão  u32
+#   8  seq     u64  ímpar = escrita em andamento, par = estável
+#  16  length  u64  bytes válidos em dados
+#  24  sha256  32s  hash dos dados
+#  64  dados   JSON UTF-8
+#
+# Leitor: lê seq; se ímpar, tenta de novo; se igual ao seq em cache, reusa o
+# objeto já parseado; senão copia dados, relê seq e confere (seq igual + hash).
+
+import os, json, mmap, struct, hashlib
+
+SHM_PATH = os.environ.get("ENTRADA_SHM", "")
+
+MAGIC = b"MFE1"
+VERSION = 1
+HEADER = struct.Struct("<4sIQQ32s")
+HEADER_SIZE = 64
+SEQ = struct.Struct("<Q")
+SEQ_OFF = 8
+
+def _capacity_for(n: int) -> int:
+    cap = 4096
+    while cap < HEADER_SIZE + n:
+        cap *= 2
+    return cap
+
+def publish_bytes(path: str, data: bytes) -> int:
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        size = os.fstat(fd).st_size
+        if size < HEADER_SIZE + len(data):
+            size = _capacity_for(len(data))
+            os.ftruncate(fd, size)
+        with mmap.mmap(fd, size) as mm:
+            magic, _, seq, _, _ = HEADER.unpack_from(mm, 0)
+            if magic != MAGIC:
+                seq = 0
+            if seq % 2:
+                seq += 1  # escritor anterior morreu no meio: normaliza
+            # 1) marca escrita em andamento
+            SEQ.pack_into(mm, SEQ_OFF, seq + 1)
+            # 2) dados + header
+            mm[HEADER_SIZE:HEADER_SIZE + len(data)] = data
+            HEADER.pack_into(mm, 0, MAGIC, VERSION, seq + 1, len(data), hashlib.sha256(data).digest())
+            # 3) libera (seq par)
+            SEQ.pack_into(mm, SEQ_OFF, seq + 2)
+            mm.flush()
+        return seq + 2
+    finally:
+        os.close(fd)
+
+def publish_json(path: str, obj: dict) -> int:
+    data = json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return publish_bytes(path, data)
+
+def read_seq(path: str) -> int:
+    with open(path, "rb") as f:
+        hdr = f.read(HEADER_SIZE)
+    if len(hdr) < HEADER_SIZE or hdr[:4] != MAGIC:
+        return 0
+    return SEQ.unpack_from(hdr, SEQ_OFF)[0]
+
+class ShmReader:
+    # guarda o último objeto parseado; só relê os dados quando seq muda
+    def __init__(self, path: str, retries: int = 50):
+        self.path = path
+        self.retries = retries
+        self.seq = 0
+        self.obj = None
+
+    def read(self):
+        for _ in range(self.retries):
+            with open(self.path, "rb") as f:
+                hdr = f.read(HEADER_SIZE)
+                if len(hdr) < HEADER_SIZE:
+                    raise RuntimeError("shm sem header")
+                magic, _, seq, length, digest = HEADER.unpack_from(hdr, 0)
+                if magic != MAGIC:
+                    raise RuntimeError("shm inválido")
+                if seq % 2:
+                    continue  # escrita em andamento
+                if seq == self.seq and self.obj is not None:
+                    return self.obj
+                data = f.read(length)
+                f.seek(SEQ_OFF)
+                seq2 = SEQ.unpack(f.read(SEQ.size))[0]
+            if seq2 != seq or len(data) != length or hashlib.sha256(data).digest() != digest:
+                continue  # leitura rasgada: tenta de novo
+            self.obj = json.loads(data.decode("utf-8"))
+            self.seq = seq
+            return self.obj
+        raise RuntimeError("shm instável (escritor não liberou)")
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Sidecar binário colunar do mfe_estudos.csv.
+# Na primeira vez que vê uma versão do CSV (tamanho + mtime) grava o sidecar;
+# as próximas leituras abrem o sidecar via mmap, sem copiar as colunas.
+# Se o tamanho ou o mtime do CSV mudam, o sidecar é refeito automaticamente.
+#
+# Layout (little-endian):
+#   header 48 bytes: magic "MFEC", versão u32, csv_size u64, csv_mtime_ns u64,
+#                    n u64, dict_len u32, reservado u32, off_data u64
+#   dicionário JSON {"par": [...], "lado": [...]} (PAR/LADO codificados)
+#   par   u32[n]   (código no dicionário)
+#   lado  u8[n]    + padding até múltiplo de 4
+#   percentil f32[n]
+#   alvo_pct  f32[n]
+
+import os, sys, json, mmap, struct
+from array import array
+
+SIDECAR_DIR = os.environ.get("MFE_CSV_SIDECAR", "")  # diretório dos sidecars; padrão: ao lado do CSV
+
+MAGIC = b"MFEC"
+VERSION = 1
+HEADER = struct.Struct("<4sIQQQIIQ")
+
+def sidecar_path_for(csv_path: str) -> str:
+    # um sidecar por CSV (<csv>.mfecol): dois CSVs nunca disputam o mesmo arquivo
+    if SIDECAR_DIR:
+        return os.path.join(SIDECAR_DIR, os.path.basename(csv_path) + ".mfecol")
+    return csv_path + ".mfecol"
+
+def _csv_sig(csv_path: str):
+    st = os.stat(csv_path)
+    return st.st_size, st.st_mtime_ns
+
+class EstudosSidecar:
+    # mesmas colunas do mfe_csv.EstudosCols, mas PAR/LADO como códigos
+    # (memoryview sobre o mmap) + dicionários
+    def __init__(self, mm, n, pars, lados, off):
+        self._mm = mm  # mantém o mmap vivo enquanto houver views
+        mv = memoryview(mm)
+        self.pars = pars
+        self.lados = lados
+        self.par_codes = mv[off:off + 4 * n].cast("I")
+        off += 4 * n
+        self.lado_codes = mv[off:off + n].cast("B")
+        off += n + (-n % 4)
+        self.percentil = mv[off:off + 4 * n].cast("f")
+        off += 4 * n
+        self.alvo_pct = mv[off:off + 4 * n].cast("f")
+
+    def __len__(self):
+        return len(self.par_codes)
+
+    def __iter__(self):
+        pars, lados = self.pars, self.lados
+        for i in range(len(self.par_codes)):
+            yield {"PAR": pars[self.par_codes[i]], "LADO": lados[self.lado_codes[i]],
+                   "PERCENTIL": round(self.percentil[i], 4), "ALVO_PCT": round(self.alvo_pct[i], 4)}
+
+def write_sidecar(cols, path: str, csv_sig) -> None:
+    pars, lados = {}, {}
+    pc = array("I", (pars.setdefault(p, len(pars)) for p in cols.par))
+    lc = array("B", (lados.setdefault(l, len(lados)) for l in cols.lado))
+    if len(lados) > 255:
+        raise RuntimeError("LADO com valores demais para u8")
+    dic = json.dumps({"par": list(pars), "lado": list(lados)}, ensure_ascii=False).encode("utf-8")
+    off = HEADER.size + len(dic)
+    off += -off % 8
+    n = len(pc)
+    d = os.path.dirname(path) or "."
+    os.makedirs(d, exist_ok=True)
+    tmp = os.path.join(d, f".tmp_{os.path.basename(path)}_{os.getpid()}")
+    try:
+        with open(tmp, "wb") as f:
+            f.write(HEADER.pack(MAGIC, VERSION, csv_sig[0], csv_sig[1], n, len(dic), 0, off))
+            f.write(dic)
+            f.write(b"\0" * (off - HEADER.size - len(dic)))
+            f.write(pc.tobytes())
+            f.write(lc.tobytes())
+            f.write(b"\0" * (-n % 4))
+            f.write(array("f", cols.percentil).tobytes())
+            f.write(array("f", cols.alvo_pct).tobytes())
+        os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+def open_sidecar(path: str, csv_sig):
+    # None se não existe / versão diferente / CSV mudou
+    try:
+        f = open(path, "rb")
+    except OSError:
+        return None
+    with f:
+        if os.fstat(f.fileno()).st_size < HEADER.size:
+            return None
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    magic, ver, size, mtime_ns, n, dict_len, _, off = HEADER.unpack_from(mm, 0)
+    if magic != MAGIC or ver != VERSION or (size, mtime_ns) != tuple(csv_sig) or sys.byteorder != "little":
+        mm.close()
+        return None
+    dic = json.loads(bytes(mm[HEADER.size:HEADER.size + dict_len]).decode("utf-8"))
+    return EstudosSidecar(mm, n, dic["par"], dic["lado"], off)
+
+def load_or_build(csv_path: str, path: str = None):
+    path = path or sidecar_path_for(csv_path)
+    sig = _csv_sig(csv_path)
+    sc = open_sidecar(path, sig)
+    if sc is not None:
+        return sc
+    import mfe_csv
+    cols = mfe_csv.read_estudos_cols(csv_path)
+    if _csv_sig(csv_path) != sig:
+        return cols  # CSV mudou durante a leitura: não grava sidecar dessa versão
+    try:
+        write_sidecar(cols, path, sig)
+    except OSError as e:
+        print(f"[WARN] sidecar não gravado ({path}): {e}")
+        return cols
+    return open_sidecar(path, sig) or cols
+
+def choose_best_sidecar(sc: EstudosSidecar):
+    # mesmo critério de choose_best_per_par, direto nos códigos
+    best = {}
+    codes, pc, al = sc.par_codes, sc.percentil, sc.alvo_pct
+    for i in range(len(codes)):
+        s = al[i] * (pc[i] / 100.0)
+        b = best.get(codes[i])
+        if b is None or s > b[0]:
+            best[codes[i]] = (s, i)
+    out = []
+    for code, (s, i) in best.items():
+        out.append({"PAR": sc.pars[code], "LADO": sc.lados[sc.lado_codes[i]],
+                    "PERCENTIL": round(pc[i], 4), "ALVO_PCT": round(al[i], 4), "_SCORE": s})
+    out.sort(key=lambda r: r["PAR"])
+    return out
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Sketch de quantis mesclável (estilo KLL) para o histórico de MFE por PAR/LADO.
+# Memória ~O(k log(n/k)) itens, independe do tamanho do histórico; erro de rank
+# ~1/k (k=200 -> ~1%). Dois sketches do mesmo PAR (shards, máquinas) se juntam
+# com merge() sem reler o histórico.
+#
+# Serialização compacta (to_bytes/from_bytes):
+#   "<HBQ" k, níveis, n  +  por nível: "<I" qtd + float32[qtd]
+
+import math, random, struct
+from array import array
+
+K = 200
+C = 2.0 / 3.0
+_rnd = random.Random()
+
+class KLLSketch:
+    __slots__ = ("k", "n", "levels", "_size", "_max")
+
+    def __init__(self, k: int = K):
+        self.k = int(k)
+        self.n = 0
+        self.levels = [[]]   # nível h: itens com peso 2**h
+        self._size = 0
+        self._max = self._capacity_total()
+
+    def _capacity(self, h: int) -> int:
+        depth = len(self.levels) - h - 1
+        return max(2, int(math.ceil(self.k * (C ** depth))))
+
+    def _capacity_total(self) -> int:
+        return sum(self._capacity(h) for h in range(len(self.levels)))
+
+    def __len__(self):
+        return self.n
+
+    def update(self, x: float):
+        self.levels[0].append(float(x))
+        self.n += 1
+        self._size += 1
+        if self._size >= self._max:
+            self._compress()
+
+    def extend(self, xs):
+        for x in xs:
+            self.update(x)
+
+    def _compress(self):
+        while self._size >= self._max:
+            for h, items in enumerate(self.levels):
+                if len(items) >= self._capacity(h):
+                    if h + 1 >= len(self.levels):
+                        self.levels.append([])
+                    items.sort()
+                    # metade sobe um nível com peso dobrado (posição par/ímpar ao acaso)
+                    keep = items[-1:] if len(items) % 2 else []
+                    body = items[:-1] if keep else items
+                    self.levels[h + 1].extend(body[_rnd.getrandbits(1)::2])
+                    self.levels[h] = keep
+                    break
+            self._size = sum(len(l) for l in self.levels)
+            self._max = self._capacity_total()
+
+    def merge(self, other: "KLLSketch") -> "KLLSketch":
+        while len(self.levels) < len(other.levels):
+            self.levels.append([])
+        for h, items in enumerate(other.levels):
+            self.levels[h].extend(items)
+        self.n += other.n
+        self._size = sum(len(l) for l in self.levels)
+        self._max = self._capacity_total()
+        self._compress()
+        return self
+
+    def _weighted(self):
+        out = []
+        for h, items in enumerate(self.levels):
+            w = 1 << h
+            out.extend((x, w) for x in items)
+        out.sort()
+        return out
+
+    def quantile(self, q: float) -> float:
+        return self.quantiles([q])[0]
+
+    def quantiles(self, qs):
+        # um sort dos itens retidos atende a todas as consultas
+        wi = self._weighted()
+        if not wi:
+            return [0.0 for _ in qs]
+        total = sum(w for _, w in wi)
+        out = []
+        for q in qs:
+            target = min(1.0, max(0.0, q)) * total
+            acc = 0
+            val = wi[-1][0]
+            for x, w in wi:
+                acc += w
+                if acc >= target:
+                    val = x
+                    break
+            out.append(val)
+        return out
+
+    def rank(self, x: float) -> float:
+        # fração dos itens <= x
+        total = below = 0
+        for h, items in enumerate(self.levels):
+            w = 1 << h
+            total += w * len(items)
+            below += w * sum(1 for v in items if v <= x)
+        return below / total if total else 0.0
+
+    def to_bytes(self) -> bytes:
+        parts = [struct.pack("<HBQ", self.k, len(self.levels), self.n)]
+        for items in self.levels:
+            parts.append(struct.pack("<I", len(items)))
+            parts.append(array("f", items).tobytes())
+        return b"".join(parts)
+
+    @classmethod
+    def from_bytes(cls, buf, offset: int = 0):
+        # devolve (sketch, offset depois do sketch)
+        k, nlev, n = struct.unpack_from("<HBQ", buf, offset)
+        offset += struct.calcsize("<HBQ")
+        s = cls(k)
+        s.n = n
+        s.levels = []
+        for _ in range(nlev):
+            (cnt,) = struct.unpack_from("<I", buf, offset)
+            offset += 4
+            a = array("f")
+            a.frombytes(bytes(buf[offset:offset + 4 * cnt]))
+            offset += 4 * cnt
+            s.levels.append(a.tolist())
+        s._size = sum(len(l) for l in s.levels)
+        s._max = s._capacity_total()
+        return s, offset
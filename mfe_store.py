@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Backend SQLite opcional (WAL) para estudos, preços e sinais publicados.
+# Ativa no worker com MFE_DB=/caminho/mfe.db (sem MFE_DB nada muda: só arquivos).
+
+import os, time, sqlite3
+
+DB_PATH = os.environ.get("MFE_DB", "")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS estudos (
+    ts        INTEGER NOT NULL,
+    par       TEXT    NOT NULL,
+    lado      TEXT    NOT NULL,
+    percentil REAL    NOT NULL,
+    alvo_pct  REAL    NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_estudos_par_lado_ts ON estudos(par, lado, ts);
+CREATE INDEX IF NOT EXISTS ix_estudos_ts ON estudos(ts);
+
+CREATE TABLE IF NOT EXISTS precos (
+    ts    INTEGER NOT NULL,
+    par   TEXT    NOT NULL,
+    preco REAL    NOT NULL,
+    PRIMARY KEY (par, ts)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS ix_precos_ts ON precos(ts);
+
+CREATE TABLE IF NOT EXISTS sinais (
+    ts         INTEGER NOT NULL,
+    par        TEXT    NOT NULL,
+    side       TEXT    NOT NULL,
+    preco      REAL,
+    alvo       REAL,
+    ganho_pct  REAL,
+    zona       TEXT,
+    risco      TEXT,
+    prioridade TEXT,
+    PRIMARY KEY (par, ts)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS ix_sinais_ts_side ON sinais(ts, side);
+"""
+
+# prepared statements (sqlite3 guarda em cache pelo texto do SQL)
+SQL_INS_ESTUDO = "INSERT INTO estudos(ts,par,lado,percentil,alvo_pct) VALUES (?,?,?,?,?)"
+SQL_INS_PRECO  = "INSERT OR REPLACE INTO precos(ts,par,preco) VALUES (?,?,?)"
+SQL_INS_SINAL  = ("INSERT OR REPLACE INTO sinais(ts,par,side,preco,alvo,ganho_pct,zona,risco,prioridade) "
+                  "VALUES (?,?,?,?,?,?,?,?,?)")
+
+def connect(path: str = None, readonly: bool = False):
+    path = path or DB_PATH
+    if not path:
+        raise RuntimeError("MFE_DB não definido")
+    if readonly:
+        conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True, timeout=5.0)
+    else:
+        d = os.path.dirname(path) or "."
+        os.makedirs(d, exist_ok=True)
+        conn = sqlite3.connect(path, timeout=5.0)
+        # WAL: worker grava enquanto o painel lê, sem travar leitores
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(SCHEMA)
+    return conn
+
+def _now_ts():
+    return int(time.time())
+
+# ---- escrita (bulk) ----
+def last_estudos_ts(conn) -> int:
+    r = conn.execute("SELECT MAX(ts) FROM estudos").fetchone()
+    return int(r[0]) if r and r[0] is not None else 0
+
+def save_estudos(conn, rows, ts: int = None) -> int:
+    # ts = versão do CSV (mtime). Mesma versão já gravada -> não duplica.
+    ts = _now_ts() if ts is None else int(ts)
+    if last_estudos_ts(conn) >= ts:
+        return 0
+    with conn:
+        conn.executemany(SQL_INS_ESTUDO, (
+            (ts, r["PAR"], r["LADO"], float(r["PERCENTIL"]), float(r["ALVO_PCT"])) for r in rows
+        ))
+    return len(rows)
+
+def save_prices(conn, prices: dict, ts: int = None) -> int:
+    ts = _now_ts() if ts is None else int(ts)
+    with conn:
+        conn.executemany(SQL_INS_PRECO, ((ts, par, float(p)) for par, p in prices.items()))
+    return len(prices)
+
+def _num_or_none(x):
+    return float(x) if isinstance(x, (int, float)) else None
+
+def save_sinais(conn, out_rows, ts: int = None) -> int:
+    ts = _now_ts() if ts is None else int(ts)
+    with conn:
+        conn.executemany(SQL_INS_SINAL, ((
+            ts, r.get("par", ""), r.get("side", ""),
+            _num_or_none(r.get("preco")), _num_or_none(r.get("alvo")), _num_or_none(r.get("ganho_pct")),
+            r.get("zona", ""), r.get("risco", ""), r.get("prioridade", ""),
+        ) for r in out_rows))
+    return len(out_rows)
+
+# ---- leitura (equivalentes de load_estudos / load_prices_any) ----
+def load_estudos_db(conn, ts: int = None, par: str = None):
+    # sem ts: última versão gravada
+    if ts is None:
+        ts = last_estudos_ts(conn)
+    sql = "SELECT par, lado, percentil, alvo_pct FROM estudos WHERE ts = ?"
+    args = [ts]
+    if par:
+        sql += " AND par = ?"
+        args.append(par.upper())
+    return [
+        {"PAR": p, "LADO": l, "PERCENTIL": pc, "ALVO_PCT": a}
+        for (p, l, pc, a) in conn.execute(sql, args)
+    ]
+
+def load_prices_db(conn, ts: int = None) -> dict:
+    if ts is None:
+        r = conn.execute("SELECT MAX(ts) FROM precos").fetchone()
+        if not r or r[0] is None:
+            return {}
+        ts = r[0]
+    return {p: v for (p, v) in conn.execute("SELECT par, preco FROM precos WHERE ts = ?", (ts,))}
+
+# ---- consultas por intervalo (indexadas) ----
+def price_history(conn, par: str, ts_from: int, ts_to: int = None):
+    ts_to = _now_ts() if ts_to is None else ts_to
+    return conn.execute(
+        "SELECT ts, preco FROM precos WHERE par = ? AND ts BETWEEN ? AND ? ORDER BY ts",
+        (par.upper(), ts_from, ts_to),
+    ).fetchall()
+
+def estudos_history(conn, par: str, lado: str, ts_from: int, ts_to: int = None):
+    ts_to = _now_ts() if ts_to is None else ts_to
+    return conn.execute(
+        "SELECT ts, percentil, alvo_pct FROM estudos WHERE par = ? AND lado = ? AND ts BETWEEN ? AND ? ORDER BY ts",
+        (par.upper(), lado.upper(), ts_from, ts_to),
+    ).fetchall()
+
+def sinais_between(conn, ts_from: int, ts_to: int = None, only_signals: bool = True):
+    ts_to = _now_ts() if ts_to is None else ts_to
+    sql = "SELECT ts, par, side, preco, alvo, ganho_pct, zona, risco, prioridade FROM sinais WHERE ts BETWEEN ? AND ?"
+    if only_signals:
+        sql += " AND side IN ('LONG','SHORT')"
+    return conn.execute(sql + " ORDER BY ts, par", (ts_from, ts_to)).fetchall()
@@ -0,0 +1,422 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Preço ao vivo entre ciclos do worker: consome um feed de ticker via websocket
+# (Binance !miniTicker@arr por padrão), mantém o último preço de cada PAR
+# (ticks coalescidos: só o mais recente importa) e, no máximo a cada
+# MFE_STREAM_INTERVAL s, publica só as linhas que mudaram (preco e dist_alvo_pct)
+# num arquivo delta ao lado do entrada.json. Não roda build_output(): alvo,
+# side, zona etc. continuam os do último ciclo.
+#
+# Delta (ENTRADA_DELTA, padrão entrada.delta.json):
+#   {"base": <ultima_atualizacao do entrada.json>, "seq": N, "atualizado": "...",
+#    "rows": {PAR: {"preco", "dist_alvo_pct", "seq"}}}
+# Acumula desde o último entrada.json (novo ciclo do worker zera). Quem já leu
+# até seq S só precisa das linhas com seq > S (/api/entrada/delta?since=S).
+# MFE_STREAM_PATCH=1 também regrava preco/dist_alvo_pct no próprio entrada.json.
+#
+#   python3 mfe_stream.py                          # feed padrão
+#   python3 mfe_stream.py ws://127.0.0.1:8765/     # outro feed (ex.: replay)
+#   python3 mfe_stream.py record arquivo.jsonl [url] [segundos]
+#   python3 mfe_stream.py replay [arquivo.jsonl] [porta]   # sem arquivo: ticks sintéticos
+
+import os, sys, json, time, asyncio
+
+FEED_URL = os.environ.get("MFE_STREAM_URL", "wss://stream.binance.com:9443/ws/!miniTicker@arr")
+ENTRADA_JSON = os.environ.get("ENTRADA_JSON", "/home/roteiro_ds/ENTRADA-MFE/entrada.json")
+DELTA_JSON = os.environ.get("ENTRADA_DELTA", "")                       # padrão: <entrada>.delta.json
+INTERVAL = float(os.environ.get("MFE_STREAM_INTERVAL", "1.0"))        # publicação no máximo 1x por intervalo
+MAX_JUMP = float(os.environ.get("MFE_STREAM_MAX_JUMP", "0.5"))        # tick >50% longe do preço do ciclo -> ignora
+PATCH = os.environ.get("MFE_STREAM_PATCH", "0") == "1"
+RECONNECT_MAX = float(os.environ.get("MFE_STREAM_RECONNECT_MAX", "30"))
+PRECO_DIGITS = 8   # dígitos significativos (casas decimais fixas zeravam BONK/PEPE/SHIB)
+
+def delta_path(entrada: str = None) -> str:
+    if DELTA_JSON:
+        return DELTA_JSON
+    base = entrada or ENTRADA_JSON
+    return (base[:-5] if base.endswith(".json") else base) + ".delta.json"
+
+# ---- websocket mínimo (RFC 6455, só texto) ----
+_WS_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+def _accept_key(key: str) -> str:
+    import base64, hashlib
+    return base64.b64encode(hashlib.sha1((key + _WS_GUID).encode("ascii")).digest()).decode("ascii")
+
+def _frame(op: int, payload: bytes, mask: bool) -> bytes:
+    import struct
+    head = bytes([0x80 | op])
+    n = len(payload)
+    mbit = 0x80 if mask else 0
+    if n < 126:
+        head += bytes([mbit | n])
+    elif n < 65536:
+        head += bytes([mbit | 126]) + struct.pack(">H", n)
+    else:
+        head += bytes([mbit | 127]) + struct.pack(">Q", n)
+    if not mask:
+        return head + payload
+    key = os.urandom(4)
+    return head + key + bytes(b ^ key[i & 3] for i, b in enumerate(payload))
+
+async def ws_connect(url: str):
+    import base64
+    from urllib.parse import urlsplit
+    u = urlsplit(url)
+    tls = u.scheme == "wss"
+    host, port = u.hostname, u.port or (443 if tls else 80)
+    reader, writer = await asyncio.open_connection(host, port, ssl=True if tls else None)
+    key = base64.b64encode(os.urandom(16)).decode("ascii")
+    path = (u.path or "/") + (f"?{u.query}" if u.query else "")
+    writer.write((f"GET {path} HTTP/1.1\r\nHost: {host}:{port}\r\nUpgrade: websocket\r\n"
+                  f"Connection: Upgrade\r\nSec-WebSocket-Key: {key}\r\n"
+                  f"Sec-WebSocket-Version: 13\r\n\r\n").encode("ascii"))
+    await writer.drain()
+    head = (await reader.readuntil(b"\r\n\r\n")).decode("latin-1")
+    if " 101 " not in head.split("\r\n", 1)[0] or _accept_key(key) not in head:
+        writer.close()
+        raise ConnectionError(f"handshake recusado: {head.splitlines()[0] if head else '-'}")
+    return reader, writer
+
+async def ws_recv(reader, writer, client: bool = True):
+    # próxima mensagem de texto (str) ou None quando a conexão fecha
+    import struct
+    parts = []
+    while True:
+        b0, b1 = await reader.readexactly(2)
+        op, n = b0 & 0x0F, b1 & 0x7F
+        if n == 126:
+            (n,) = struct.unpack(">H", await reader.readexactly(2))
+        elif n == 127:
+            (n,) = struct.unpack(">Q", await reader.readexactly(8))
+        key = await reader.readexactly(4) if b1 & 0x80 else None
+        data = await reader.readexactly(n)
+        if key:
+            data = bytes(b ^ key[i & 3] for i, b in enumerate(data))
+        if op == 0x8:
+            return None
+        if op == 0x9:
+            writer.write(_frame(0xA, data, client))
+            await writer.drain()
+            continue
+        if op == 0xA:
+            continue
+        parts.append(data)
+        if b0 & 0x80:
+            return b"".join(parts).decode("utf-8", "replace")
+
+# ---- ticks ----
+def parse_ticks(msg: str):
+    # [(PAR, preco)] de mensagens ticker/miniTicker (lista, objeto ou {"data": ...})
+    try:
+        obj = json.loads(msg)
+    except Exception:
+        return []
+    if isinstance(obj, dict) and "data" in obj:
+        obj = obj["data"]
+    items = obj if isinstance(obj, list) else [obj]
+    out = []
+    for it in items:
+        if not isinstance(it, dict):
+            continue
+        sym = str(it.get("s") or "")
+        if not sym.endswith("USDT"):
+            continue
+        try:
+            px = float(it.get("c"))
+        except Exception:
+            continue
+        if px > 0:
+            out.append((sym[:-4], px))
+    return out
+
+def round_preco(preco: float) -> float:
+    return float(f"{preco:.{PRECO_DIGITS}g}")
+
+def dist_alvo_pct(side: str, preco: float, alvo):
+    # quanto falta (em % do preço atual) para o alvo; negativo = alvo já passou
+    try:
+        alvo = float(alvo)
+    except (TypeError, ValueError):
+        return None
+    if preco <= 0 or alvo <= 0:
+        return None
+    if side == "LONG":
+        return round((alvo / preco - 1.0) * 100.0, 2)
+    if side == "SHORT":
+        return round((1.0 - alvo / preco) * 100.0, 2)
+    return None
+
+class LiveBoard:
+    # preço ao vivo por PAR sobre as linhas do último entrada.json
+    def __init__(self, entrada: str = None):
+        self.entrada = entrada or ENTRADA_JSON
+        self.delta = delta_path(self.entrada)
+        self.sig = None
+        self.data = {}
+        self.base = {}      # PAR -> linha do entrada.json
+        self.live = {}      # PAR -> último preço recebido
+        self.dirty = set()
+        self.overlay = {}   # PAR -> {"preco", "dist_alvo_pct", "seq"} publicado
+        self.seq = 0
+        self.ticks = 0
+        self.ignored = 0
+
+    def refresh_base(self) -> bool:
+        import mfe_watch
+        sig = mfe_watch.file_sig(self.entrada)
+        if sig is None or sig == self.sig:
+            return False
+        try:
+            with open(self.entrada, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except Exception:
+            return False  # no meio de uma troca: tenta no próximo intervalo
+        self.sig = sig
+        self.data = data
+        self.base = {(r.get("par") or "").upper(): r for r in data.get("posicional") or [] if r.get("par")}
+        # novo ciclo do worker: preços do arquivo são a nova base
+        self.overlay = {}
+        self.dirty = set(self.live) & set(self.base)
+        return True
+
+    def on_tick(self, par: str, preco: float):
+        self.ticks += 1
+        row = self.base.get(par)
+        if row is None or row.get("preco_motivo"):
+            return  # sem linha ou preço em quarentena (mfe_sanity): tick não traz de volta
+        ref = float(row.get("preco") or 0)
+        if ref <= 0:
+            return
+        if abs(preco / ref - 1.0) > MAX_JUMP:
+            self.ignored += 1
+            return
+        if self.live.get(par) != preco:
+            self.live[par] = preco
+            self.dirty.add(par)
+
+    def changes(self) -> dict:
+        out = {}
+        for par in self.dirty:
+            row = self.base.get(par)
+            if row is None:
+                continue
+            preco = round_preco(self.live[par])
+            cur = self.overlay.get(par)
+            if cur is not None and cur["preco"] == preco:
+                continue
+            if cur is None and preco == row.get("preco"):
+                continue
+            out[par] = {"preco": preco, "dist_alvo_pct": dist_alvo_pct(str(row.get("side", "")).upper(), preco, row.get("alvo"))}
+        self.dirty.clear()
+        return out
+
+    def publish(self) -> int:
+        self.refresh_base()
+        ch = self.changes()
+        if not ch:
+            return 0
+        self.seq += 1
+        for par, v in ch.items():
+            v["seq"] = self.seq
+            self.overlay[par] = v
+        import worker_mfe
+        worker_mfe.atomic_write_json(self.delta, {
+            "base": self.data.get("ultima_atualizacao") or "",
+            "seq": self.seq,
+            "atualizado": worker_mfe.now_brt().strftime("%Y-%m-%d %H:%M:%S"),
+            "rows": self.overlay,
+        })
+        if PATCH:
+            self.patch_entrada()
+        return len(ch)
+
+    def patch_entrada(self) -> bool:
+        # grava num temporário e confere a assinatura de novo logo antes do
+        # os.replace: se o worker publicou enquanto isso, desiste (a próxima
+        # rodada parte do arquivo novo) em vez de apagar o ciclo dele
+        import tempfile, mfe_watch, worker_mfe
+        if mfe_watch.file_sig(self.entrada) != self.sig:
+            return False
+        # cópias: as linhas de self.base seguem com o preço do ciclo (referência do on_tick)
+        rows = []
+        for r in self.data.get("posicional") or []:
+            v = self.overlay.get((r.get("par") or "").upper())
+            if v is not None and float(r.get("preco") or 0) > 0 and not r.get("preco_motivo"):
+                r = {**r, "preco": v["preco"], "dist_alvo_pct": v["dist_alvo_pct"]}
+            rows.append(r)
+        payload = {**self.data, "posicional": rows}
+        data = json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        fd, tmp = tempfile.mkstemp(prefix=".tmp_", suffix=".json", dir=os.path.dirname(self.entrada) or ".")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            new_sig = mfe_watch.file_sig(tmp)   # os.replace mantém mtime/tamanho
+            if mfe_watch.file_sig(self.entrada) != self.sig:
+                return False
+            os.replace(tmp, self.entrada)
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+        self.sig = new_sig
+        # irmãos pré-comprimidos e snapshot em memória só depois do JSON aceito
+        if worker_mfe.COMPRESS:
+            import mfe_publish
+            mfe_publish.write_siblings(self.entrada, data)
+        if worker_mfe.SHM_PATH and self.entrada == worker_mfe.OUT_JSON:
+            import mfe_shm
+            mfe_shm.publish_json(worker_mfe.SHM_PATH, payload)
+        return True
+
+async def consume(board: LiveBoard, url: str, stop: asyncio.Event):
+    delay = 1.0
+    while not stop.is_set():
+        try:
+            reader, writer = await ws_connect(url)
+            delay = 1.0
+            try:
+                while not stop.is_set():
+                    msg = await ws_recv(reader, writer)
+                    if msg is None:
+                        break
+                    for par, px in parse_ticks(msg):
+                        board.on_tick(par, px)
+            finally:
+                writer.close()
+        except (OSError, asyncio.IncompleteReadError, ConnectionError) as e:
+            print(f"[WARN] feed: {e}; reconectando em {delay:.0f}s")
+        if stop.is_set():
+            break
+        try:
+            await asyncio.wait_for(stop.wait(), delay)
+        except asyncio.TimeoutError:
+            pass
+        delay = min(RECONNECT_MAX, delay * 2)
+
+async def publisher(board: LiveBoard, stop: asyncio.Event):
+    while not stop.is_set():
+        try:
+            await asyncio.wait_for(stop.wait(), INTERVAL)
+        except asyncio.TimeoutError:
+            pass
+        try:
+            board.publish()
+        except Exception as e:
+            print(f"[WARN] publicação do delta falhou: {e}")
+
+async def run(url: str = None, duration: float = 0.0, board: LiveBoard = None):
+    board = board or LiveBoard()
+    board.refresh_base()
+    stop = asyncio.Event()
+    tasks = [asyncio.create_task(consume(board, url or FEED_URL, stop)),
+             asyncio.create_task(publisher(board, stop))]
+    try:
+        if duration > 0:
+            await asyncio.sleep(duration)
+        else:
+            await asyncio.Event().wait()
+    finally:
+        stop.set()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        board.publish()
+    return board
+
+# ---- gravação / replay local (testes) ----
+async def record(path: str, url: str, seconds: float):
+    reader, writer = await ws_connect(url)
+    t0 = time.monotonic()
+    n = 0
+    with open(path, "w", encoding="utf-8") as f:
+        while time.monotonic() - t0 < seconds:
+            try:
+                msg = await asyncio.wait_for(ws_recv(reader, writer), max(0.1, seconds - (time.monotonic() - t0)))
+            except asyncio.TimeoutError:
+                break
+            if msg is None:
+                break
+            f.write(json.dumps({"t": round(time.monotonic() - t0, 3), "m": msg}) + "\n")
+            n += 1
+    writer.close()
+    return n
+
+def synthetic_messages(entrada: str, n: int = 600, step: float = 1.0, seed: int = 0):
+    # passeio aleatório a partir dos preços do entrada.json, no formato miniTicker@arr
+    import random
+    rnd = random.Random(seed)
+    with open(entrada, "r", encoding="utf-8") as f:
+        rows = json.load(f).get("posicional") or []
+    px = {r["par"]: float(r["preco"]) for r in rows if r.get("par") and float(r.get("preco") or 0) > 0}
+    for i in range(n):
+        batch = []
+        for par in rnd.sample(sorted(px), max(1, len(px) // 3)):
+            px[par] *= 1.0 + rnd.gauss(0, 0.002)
+            batch.append({"e": "24hrMiniTicker", "s": f"{par}USDT", "c": f"{px[par]:.8f}"})
+        yield {"t": i * step, "m": json.dumps(batch)}
+
+async def serve_replay(messages, host: str = "127.0.0.1", port: int = 8765, speed: float = 1.0, loop: bool = True):
+    messages = list(messages)
+
+    async def handle(reader, writer):
+        try:
+            head = (await reader.readuntil(b"\r\n\r\n")).decode("latin-1")
+            key = ""
+            for line in head.split("\r\n"):
+                if line.lower().startswith("sec-websocket-key:"):
+                    key = line.split(":", 1)[1].strip()
+            writer.write((f"HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\n"
+                          f"Connection: Upgrade\r\nSec-WebSocket-Accept: {_accept_key(key)}\r\n\r\n").encode("ascii"))
+            await writer.drain()
+            while True:
+                last = 0.0
+                for m in messages:
+                    await asyncio.sleep(max(0.0, (m["t"] - last) / speed))
+                    last = m["t"]
+                    writer.write(_frame(0x1, m["m"].encode("utf-8"), False))
+                    await writer.drain()
+                if not loop:
+                    break
+            writer.write(_frame(0x8, b"", False))
+            await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    return await asyncio.start_server(handle, host, port)
+
+def main():
+    args = sys.argv[1:]
+    if args and args[0] == "record":
+        if len(args) < 2:
+            raise SystemExit("uso: mfe_stream.py record arquivo.jsonl [url] [segundos]")
+        url = args[2] if len(args) > 2 else FEED_URL
+        secs = float(args[3]) if len(args) > 3 else 60.0
+        n = asyncio.run(record(args[1], url, secs))
+        print(f"[OK] {n} mensagens gravadas em {args[1]}")
+        return
+    if args and args[0] == "replay":
+        port = int(args[2]) if len(args) > 2 else 8765
+        if len(args) > 1 and args[1] != "-":
+            with open(args[1], "r", encoding="utf-8") as f:
+                msgs = [json.loads(l) for l in f if l.strip()]
+        else:
+            msgs = list(synthetic_messages(ENTRADA_JSON))
+
+        async def _serve():
+            srv = await serve_replay(msgs, port=port, speed=float(os.environ.get("MFE_REPLAY_SPEED", "1")))
+            print(f"[OK] replay em ws://127.0.0.1:{port}/ | {len(msgs)} mensagens")
+            async with srv:
+                await srv.serve_forever()
+        asyncio.run(_serve())
+        return
+    url = args[0] if args else FEED_URL
+    print(f"[OK] stream {url} -> {delta_path()} (a cada {INTERVAL:g}s)")
+    try:
+        asyncio.run(run(url))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Observa arquivos de entrada (CSV de estudos, cache de preços, lista de moedas).
+# Linux: inotify via ctypes (sem dependência). Fallback: polling de mtime/tamanho.
+# Observa o DIRETÓRIO de cada arquivo, porque os escritores usam os.replace()
+# (o inode muda a cada publicação).
+
+import os, time, select, struct
+
+IN_MODIFY      = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO    = 0x00000080
+IN_CREATE      = 0x00000100
+IN_DELETE      = 0x00000200
+IN_NONBLOCK    = 0o4000
+IN_CLOEXEC     = 0o2000000
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_MODIFY
+
+EVENT = struct.Struct("iIII")
+
+def file_sig(path: str):
+    try:
+        st = os.stat(path)
+        return (st.st_mtime_ns, st.st_size)
+    except OSError:
+        return None
+
+def _inotify_libc():
+    import ctypes, ctypes.util
+    libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+    libc.inotify_init1.argtypes = [ctypes.c_int]
+    libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+    return libc
+
+class Watcher:
+    def __init__(self, paths, debounce: float = 1.0, poll: float = 2.0, use_inotify: bool = True,
+                 max_wait: float = 0.0):
+        self.paths = [os.path.abspath(p) for p in paths if p]
+        self.debounce = debounce
+        # teto da espera contado do primeiro evento: escritor mais rápido que o
+        # debounce não adia o recálculo para sempre (0 = debounce * 10)
+        self.max_wait = max_wait if max_wait > 0 else debounce * 10
+        self.poll = poll
+        self.sigs = {p: file_sig(p) for p in self.paths}
+        self.fd = None
+        self.wd_dirs = {}
+        if use_inotify:
+            try:
+                self._init_inotify()
+            except Exception:
+                self.fd = None  # sem inotify (outro SO / limite de watches): polling
+
+    @property
+    def mode(self) -> str:
+        return "inotify" if self.fd is not None else "poll"
+
+    def _init_inotify(self):
+        libc = _inotify_libc()
+        fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if fd < 0:
+            raise OSError("inotify_init1")
+        for d in sorted({os.path.dirname(p) for p in self.paths}):
+            wd = libc.inotify_add_watch(fd, d.encode(), WATCH_MASK)
+            if wd < 0:
+                os.close(fd)
+                raise OSError(f"inotify_add_watch {d}")
+            self.wd_dirs[wd] = d
+        self.fd = fd
+
+    def close(self):
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
+
+    def _drain_inotify(self) -> bool:
+        # só interessa se algum evento tocou um dos nomes observados
+        hit = False
+        while True:
+            try:
+                buf = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                return hit
+            if not buf:
+                return hit
+            i = 0
+            while i + EVENT.size <= len(buf):
+                wd, _, _, ln = EVENT.unpack_from(buf, i)
+                name = buf[i + EVENT.size:i + EVENT.size + ln].split(b"\0", 1)[0].decode(errors="ignore")
+                i += EVENT.size + ln
+                if os.path.join(self.wd_dirs.get(wd, ""), name) in self.sigs:
+                    hit = True
+
+    def _wait_raw(self, timeout) -> bool:
+        if self.fd is not None:
+            r, _, _ = select.select([self.fd], [], [], timeout)
+            return bool(r) and self._drain_inotify()
+        time.sleep(self.poll if timeout is None else min(self.poll, timeout))
+        return True  # polling: quem decide é a comparação de assinatura
+
+    def changed(self):
+        out = set()
+        for p in self.paths:
+            s = file_sig(p)
+            if s != self.sigs[p]:
+                self.sigs[p] = s
+                out.add(p)
+        return out
+
+    def wait(self, timeout: float = None):
+        # bloqueia até algum arquivo mudar; agrega rajadas (debounce) e
+        # devolve o conjunto de caminhos cuja assinatura (mtime, tamanho) mudou
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            left = None if deadline is None else max(0.0, deadline - time.monotonic())
+            if self._wait_raw(left) and self.changed_pending():
+                break
+            if deadline is not None and time.monotonic() >= deadline:
+                return set()
+        # debounce: espera ficar quieto por `debounce` segundos, no máximo até max_wait
+        cap = time.monotonic() + self.max_wait
+        if self.fd is not None:
+            while True:
+                left = cap - time.monotonic()
+                if left <= 0 or not self._wait_raw(min(self.debounce, left)):
+                    break
+        else:
+            while True:
+                left = cap - time.monotonic()
+                if left <= 0:
+                    break
+                before = {p: file_sig(p) for p in self.paths}
+                time.sleep(min(self.debounce, left))
+                if before == {p: file_sig(p) for p in self.paths}:
+                    break
+        return self.changed()
+
+    def changed_pending(self) -> bool:
+        return any(file_sig(p) != self.sigs[p] for p in self.paths)
@@ -2,6 +2,7 @@
 
 const fs = require("fs");
 const path = require("path");
+const crypto = require("crypto");
 const express = require("express");
 
 const app = express();
@@ -13,6 +14,9 @@ const INDEX_HTML = path.join(ROOT, "index.html");
 // JSON que o worker grava (não mexe no worker)
 const ENTRADA_PATH = process.env.ENTRADA_JSON || "/home/roteiro_ds/ENTRADA-MFE/entrada.json";
 
+// Snapshot mapeado em memória publicado pelo Python (opcional, ver mfe_shm.py)
+const ENTRADA_SHM = process.env.ENTRADA_SHM || "";
+
 // Lista 77 moedas (1 por linha)
 const UNIVERSE_TXT = process.env.MFE_UNIVERSE_TXT || path.join(ROOT, "coins_77.txt");
 
@@ -76,10 +80,51 @@ function loadUniverse(fallbackList) {
   return uniqUpper((fallbackList || []).map((x) => x.par));
 }
 
+// header: magic(4) versão(u32) seq(u64) length(u64) sha256(32) ... dados em 64
+const SHM_HEADER = 64;
+let SHM_CACHE = { seq: -1, data: null };
+
+function readShm() {
+  const fd = fs.openSync(ENTRADA_SHM, "r");
+  try {
+    for (let i = 0; i < 50; i++) {
+      const hdr = Buffer.alloc(SHM_HEADER);
+      if (fs.readSync(fd, hdr, 0, SHM_HEADER, 0) < SHM_HEADER) throw new Error("shm sem header");
+      if (hdr.toString("latin1", 0, 4) !== "MFE1") throw new Error("shm inválido");
+      const seq = Number(hdr.readBigUInt64LE(8));
+      if (seq % 2) continue; // escrita em andamento
+      if (seq === SHM_CACHE.seq && SHM_CACHE.data) return SHM_CACHE.data; // nada mudou: sem leitura
+      const len = Number(hdr.readBigUInt64LE(16));
+      const body = Buffer.alloc(len);
+      fs.readSync(fd, body, 0, len, SHM_HEADER);
+      const chk = Buffer.alloc(8);
+      fs.readSync(fd, chk, 0, 8, 8);
+      if (Number(chk.readBigUInt64LE(0)) !== seq) continue;
+      const digest = crypto.createHash("sha256").update(body).digest();
+      if (!digest.equals(hdr.subarray(24, 56))) continue;
+      SHM_CACHE = { seq, data: JSON.parse(body.toString("utf8")) };
+      return SHM_CACHE.data;
+    }
+    throw new Error("shm instável");
+  } finally {
+    fs.closeSync(fd);
+  }
+}
+
 function readJsonSafe() {
-  const raw = fs.readFileSync(ENTRADA_PATH, "utf8").trim();
-  if (!raw) throw new Error("arquivo vazio");
-  const data = JSON.parse(raw);
+  let data = null;
+  if (ENTRADA_SHM) {
+    try {
+      data = readShm();
+    } catch (_) {
+      data = null; // cai para o arquivo
+    }
+  }
+  if (!data) {
+    const raw = fs.readFileSync(ENTRADA_PATH, "utf8").trim();
+    if (!raw) throw new Error("arquivo vazio");
+    data = JSON.parse(raw);
+  }
 
   const list = Array.isArray(data.posicional) ? data.posicional : [];
   const ultima = (data.ultima_atualizacao || "").toString().trim();
@@ -89,6 +134,7 @@ function readJsonSafe() {
     ultima_atualizacao: ultima,
     gain_min: data.gain_min,
     assert_min: data.assert_min,
+    agregados: data.agregados && typeof data.agregados === "object" ? data.agregados : null,
   };
 }
 
@@ -154,6 +200,31 @@ function countSignals(list) {
   return n;
 }
 
+// agregados do publicador (mfe_aggs) valem para as linhas servidas quando toda
+// linha publicada está no universo; as que fillToUniverse completa são NÃO ENTRAR
+// sem zona/risco/prioridade ("-" no mfe_aggs) e entram na conta aqui.
+// Linha publicada fora do universo (ou duplicada): null, quem usa varre as linhas.
+function aggregatesFor(data, universe, filled) {
+  const agg = data.agregados;
+  const list = data.posicional || [];
+  if (!agg || agg.total !== list.length) return null;
+  const uni = new Set(universe);
+  const pubs = new Set();
+  for (const it of list) {
+    const par = String(it.par || "").trim().toUpperCase();
+    if (!par || !uni.has(par) || pubs.has(par)) return null;
+    pubs.add(par);
+  }
+  const extra = filled.length - pubs.size;
+  if (!extra) return agg;
+  const out = { ...agg, total: agg.total + extra };
+  for (const [dim, v] of [["side", "NÃO ENTRAR"], ["zona", "-"], ["risco", "-"], ["prioridade", "-"]]) {
+    const cur = (agg[dim] || {})[v] || { n: 0, ganho_medio: null };
+    out[dim] = { ...(agg[dim] || {}), [v]: { ...cur, n: cur.n + extra } };
+  }
+  return out;
+}
+
 // static
 app.use((req, res, next) => {
   res.setHeader("Cache-Control", "no-store");
@@ -184,6 +255,7 @@ app.get("/api/entrada", (req, res) => {
 
   const universe = loadUniverse(data.posicional);
   const filled = fillToUniverse(data.posicional, universe, now);
+  const agregados = aggregatesFor(data, universe, filled);
 
   res.json({
     posicional: filled,
@@ -194,7 +266,10 @@ app.get("/api/entrada", (req, res) => {
     server_time: now.time,
     universo_total: universe.length,
     total_exibidas: filled.length,
-    total_sinais: countSignals(filled),
+    // agregados vêm prontos do publicador; varre as linhas se faltarem (JSON antigo)
+    // ou não cobrirem o que é servido
+    total_sinais: agregados ? agregados.sinais : countSignals(filled),
+    agregados,
     gain_min: data.gain_min ?? null,
     assert_min: data.assert_min ?? null,
   });
@@ -220,8 +295,50 @@ app.get("/top10", (req,res)=>{
 // ===== TOP10 (MFE) =====
 const TOP10_JSON = process.env.TOP10_JSON || path.join(ROOT, "top10.json");
 
+// irmãos pré-comprimidos gravados pelo Python (mfe_publish.py): .br/.gz + manifesto .etag
+// etag (mesmo formato do mfe_publish.etag) do JSON atual; só refaz o hash quando mtime/tamanho mudam
+const JSON_ETAG = new Map();
+
+function jsonEtag(jsonPath) {
+  const st = fs.statSync(jsonPath);
+  const hit = JSON_ETAG.get(jsonPath);
+  if (hit && hit.mtimeMs === st.mtimeMs && hit.size === st.size) return hit.etag;
+  const etag = '"' + crypto.createHash("sha256").update(fs.readFileSync(jsonPath)).digest("hex").slice(0, 32) + '"';
+  JSON_ETAG.set(jsonPath, { mtimeMs: st.mtimeMs, size: st.size, etag });
+  return etag;
+}
+
+function sendPrecompressed(req, res, jsonPath) {
+  const accept = String(req.headers["accept-encoding"] || "");
+  let man;
+  try {
+    man = JSON.parse(fs.readFileSync(jsonPath + ".etag", "utf8"));
+    // manifesto de outra versão (publicação no meio, mesmo tamanho): serve o JSON cru
+    if (!man || !man.etag || man.etag.json !== jsonEtag(jsonPath)) return false;
+  } catch (_) {
+    return false;
+  }
+  for (const [kind, enc] of [["br", "br"], ["gz", "gzip"]]) {
+    if (!man.etag || !man.etag[kind] || !accept.includes(enc)) continue;
+    let body;
+    try {
+      body = fs.readFileSync(`${jsonPath}.${kind}`);
+    } catch (_) {
+      continue;
+    }
+    res.setHeader("Content-Type", "application/json; charset=utf-8");
+    res.setHeader("Content-Encoding", enc);
+    res.setHeader("Vary", "Accept-Encoding");
+    res.setHeader("ETag", man.etag[kind]);
+    res.send(body);
+    return true;
+  }
+  return false;
+}
+
 app.get("/api/top10", (req, res) => {
   try {
+    if (sendPrecompressed(req, res, TOP10_JSON)) return;
     const raw = fs.readFileSync(TOP10_JSON, "utf-8");
     res.setHeader("Content-Type", "application/json; charset=utf-8");
     res.send(raw);
@@ -235,6 +352,28 @@ app.get("/top10", (req, res) => {
 });
 // =========================
 
+// ===== preço ao vivo (mfe_stream.py) =====
+const ENTRADA_DELTA = process.env.ENTRADA_DELTA || ENTRADA_PATH.replace(/\.json$/, "") + ".delta.json";
+
+// ?since=S -> só as linhas alteradas depois do seq S (mesma base)
+app.get("/api/entrada/delta", (req, res) => {
+  let d;
+  try {
+    d = JSON.parse(fs.readFileSync(ENTRADA_DELTA, "utf8"));
+  } catch (_) {
+    return res.json({ base: "", seq: 0, rows: {} });
+  }
+  const since = Number(req.query.since || 0);
+  if (since > 0 && req.query.base === d.base) {
+    const rows = {};
+    for (const [par, v] of Object.entries(d.rows || {})) {
+      if (v && v.seq > since) rows[par] = v;
+    }
+    d.rows = rows;
+  }
+  res.json(d);
+});
+
 
 
 app.listen(PORT, () => {
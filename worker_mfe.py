@@ -1,11 +1,12 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
-import os, json, csv, time, math, tempfile
-from datetime import datetime
-from zoneinfo import ZoneInfo
+# Imports pesados (csv, tempfile, zoneinfo, módulos mfe_*) ficam dentro das
+# funções que usam: o worker roda a cada ciclo e o import pesa no tempo total.
+import os, sys, json, time
 
-TZ = ZoneInfo("America/Sao_Paulo")
+TZ_NAME = os.environ.get("APP_TZ", "America/Sao_Paulo")
+_TZ = None
 
 CSV_PATH = os.environ.get("MFE_CSV", "/home/roteiro_ds/autotrader-planilhas-python/data/mfe_estudos.csv")
 PRICES_PATH = os.environ.get("MFE_PRICES_JSON", "/home/roteiro_ds/ENTRADA-MFE/precos_cache.json")
@@ -14,17 +15,51 @@ OUT_JSON = os.environ.get("ENTRADA_JSON", "/home/roteiro_ds/ENTRADA-MFE/entrada.
 ASSERT_MIN = float(os.environ.get("ASSERT_MIN", "65"))   # usa PERCENTIL como “assertividade”
 GAIN_MIN   = float(os.environ.get("GAIN_MIN", "3"))      # ALVO_PCT mínimo
 
+DB_PATH = os.environ.get("MFE_DB", "")                    # opcional: SQLite (WAL) com estudos/preços/sinais
+SHM_PATH = os.environ.get("ENTRADA_SHM", "")              # opcional: snapshot mapeado em memória (seqlock)
+COMPRESS = os.environ.get("MFE_COMPRESS", "")             # opcional: "gz,br" -> irmãos pré-comprimidos (mfe_publish)
+
+CSV_READER = os.environ.get("MFE_CSV_READER", "dict").strip().lower()  # "cols": leitor colunar (mfe_csv); "sidecar": + cache binário (mfe_sidecar)
+PRICE_SANITY = os.environ.get("MFE_PRICE_SANITY", "1") == "1"  # quarentena de preços suspeitos (mfe_sanity)
+# "lower": filtro do ASSERT_MIN usa o limite inferior do IC bootstrap da taxa de acerto (mfe_ci) em vez do PERCENTIL
+ASSERT_MODE = os.environ.get("MFE_ASSERT_MODE", "point").strip().lower()
+ASSERT_CI = ASSERT_MODE == "lower" or os.environ.get("MFE_ASSERT_CI", "0") == "1"  # publica assert_ci nas linhas
+ALLOC = os.environ.get("MFE_ALLOC", "0") == "1"            # opcional: peso_pct por sinal (mfe_alloc)
+
+# modo residente (--watch ou MFE_TRIGGER=watch): recalcula quando os arquivos mudam
+TRIGGER = os.environ.get("MFE_TRIGGER", "").strip().lower()
+COINS_FILE = os.environ.get("MFE_COINS_FILE", "/home/roteiro_ds/ENTRADA-MFE/coins_77.txt")
+WATCH_DEBOUNCE = float(os.environ.get("MFE_WATCH_DEBOUNCE", "1.0"))  # segundos sem eventos antes de recalcular
+WATCH_MAX_WAIT = float(os.environ.get("MFE_WATCH_MAX_WAIT", "0"))    # teto desde o 1º evento (0 = 10x debounce)
+WATCH_POLL = float(os.environ.get("MFE_WATCH_POLL", "2.0"))          # intervalo do fallback por mtime
+WATCH_ENRICH = os.environ.get("MFE_WATCH_ENRICH", "1") == "1"        # roda mfe_enrich após publicar
+CTL_SOCK = os.environ.get("MFE_CTL_SOCK", "")                        # socket unix de controle (mfe_ctl)
+
 # ---- util ----
+def tz():
+    global _TZ
+    if _TZ is None:
+        from zoneinfo import ZoneInfo
+        _TZ = ZoneInfo(TZ_NAME)
+    return _TZ
+
 def now_brt():
-    return datetime.now(TZ)
+    from datetime import datetime
+    return datetime.now(tz())
 
 def atomic_write_json(path: str, obj: dict):
+    import tempfile
     d = os.path.dirname(path) or "."
     os.makedirs(d, exist_ok=True)
+    data = json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    if COMPRESS:
+        # .gz/.br/.etag antes; o JSON entra por último (os.replace)
+        import mfe_publish
+        mfe_publish.write_siblings(path, data)
     fd, tmp = tempfile.mkstemp(prefix=".tmp_", suffix=".json", dir=d)
     try:
-        with os.fdopen(fd, "w", encoding="utf-8") as f:
-            json.dump(obj, f, ensure_ascii=False, separators=(",", ":"))
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
             f.flush()
             os.fsync(f.fileno())
         os.replace(tmp, path)
@@ -63,6 +98,30 @@ def load_prices_any(path: str) -> dict:
                         prices[str(kk).upper()] = float(vv)
     return prices
 
+def load_prices_checked(sanity=None):
+    # preços + quarentena {PAR: motivo}; sem sanity o vetor passa direto
+    import mfe_watch
+    snap = mfe_watch.file_sig(PRICES_PATH)   # antes de ler: arquivo trocado depois conta como novo
+    prices = load_prices_any(PRICES_PATH)
+    if not PRICE_SANITY:
+        return prices, {}
+    import mfe_sanity
+    persist = sanity is None and mfe_sanity.STATE_PATH
+    if sanity is None:
+        sanity = mfe_sanity.PriceSanity()
+        if persist:
+            sanity.load(mfe_sanity.STATE_PATH)
+    ages = mfe_sanity.load_price_ages(PRICES_PATH, prices)
+    ok = sanity.check(prices, ages, snap)
+    if persist:
+        try:
+            sanity.save(mfe_sanity.STATE_PATH)
+        except Exception as e:
+            print(f"[WARN] sanity state: {e}")
+    if sanity.quarentena:
+        print(f"[WARN] Quarentena de preço: {sanity.quarentena}")
+    return ok, dict(sanity.quarentena)
+
 def zone_from_percentil(p: float) -> str:
     if p >= 70: return "VERDE"
     if p >= 50: return "AMARELA"
@@ -90,6 +149,7 @@ def to_float(x):
 
 # ---- load estudos ----
 def load_estudos(csv_path: str):
+    import csv
     rows = []
     with open(csv_path, "r", encoding="utf-8") as f:
         r = csv.DictReader(f, delimiter=";")
@@ -124,59 +184,177 @@ def choose_best_per_par(rows):
             best[par] = rr
     return [best[k] for k in sorted(best.keys())]
 
-def build_output():
-    prices = load_prices_any(PRICES_PATH)
-    estudos = load_estudos(CSV_PATH)
-    escolhidos = choose_best_per_par(estudos)
+# ---- sqlite (opcional) ----
+def persist_db(estudos, prices, out_rows):
+    # falha no banco nunca derruba o ciclo: o JSON continua sendo a saída oficial
+    try:
+        import mfe_store
+        conn = mfe_store.connect(DB_PATH)
+        try:
+            try:
+                csv_ts = int(os.path.getmtime(CSV_PATH))
+            except OSError:
+                csv_ts = None
+            ts = int(time.time())
+            mfe_store.save_estudos(conn, estudos, csv_ts)
+            mfe_store.save_prices(conn, prices, ts)
+            mfe_store.save_sinais(conn, out_rows, ts)
+        finally:
+            conn.close()
+    except Exception as e:
+        print(f"[WARN] SQLite ({DB_PATH}): {e}")
+
+def choose_columnar(estudos):
+    if hasattr(estudos, "par_codes"):
+        import mfe_sidecar
+        return mfe_sidecar.choose_best_sidecar(estudos)
+    import mfe_csv
+    return mfe_csv.choose_best_cols(estudos)
+
+def load_estudos_any(csv_path: str):
+    # devolve (estudos, escolhidos); nos modos "cols"/"sidecar" estudos é colunar
+    if CSV_READER == "sidecar":
+        import mfe_sidecar
+        sc = mfe_sidecar.load_or_build(csv_path)
+        return sc, choose_columnar(sc)
+    if CSV_READER == "cols":
+        import mfe_csv
+        cols = mfe_csv.read_estudos_cols(csv_path)
+        return cols, mfe_csv.choose_best_cols(cols)
+    estudos = load_estudos(csv_path)
+    return estudos, choose_best_per_par(estudos)
+
+def build_row(e, preco: float, data_str: str, hora_str: str, ci=False) -> dict:
+    # ci: False = sem IC; None = IC pedido mas sem histórico; dict = mfe_ci.hit_ci()
+    lado = e["LADO"]
+    percentil = float(e["PERCENTIL"])
+    alvo_pct = float(e["ALVO_PCT"])
+
+    assert_val = percentil
+    if ASSERT_MODE == "lower" and ci is not False:
+        # sem histórico suficiente não há limite inferior: não passa
+        assert_val = ci["lo"] if ci else -1.0
+
+    # Filtro oficial (se não bate mínimo, vira “NÃO ENTRAR”)
+    if assert_val < ASSERT_MIN or alvo_pct < GAIN_MIN or preco <= 0:
+        side = "NÃO ENTRAR"
+        alvo = ""
+        ganho_pct = ""
+    else:
+        side = lado if lado in ("LONG","SHORT") else "NÃO ENTRAR"
+        if side == "LONG":
+            alvo = round(preco * (1.0 + alvo_pct/100.0), 3)
+        elif side == "SHORT":
+            alvo = round(preco * (1.0 - alvo_pct/100.0), 3)
+        else:
+            alvo = ""
+        ganho_pct = round(alvo_pct, 2)
+
+    zona = zone_from_percentil(percentil)
+    risco = risco_from_percentil(percentil)
+    prioridade = prioridade_from_gain(float(alvo_pct), zona)
+
+    row = {
+        "par": e["PAR"],
+        "side": side,
+        "preco": round(preco, 3) if preco else 0.0,
+        "alvo": alvo if alvo != "" else "",
+        "ganho_pct": ganho_pct if ganho_pct != "" else "",
+        "zona": zona,
+        "risco": risco,
+        "prioridade": prioridade,
+        "data": data_str,
+        "hora": hora_str,
+    }
+    if ci is not False:
+        row["assert_ci"] = ci
+    return row
+
+class ParTracker:
+    # Memoriza, por PAR, as entradas do último cálculo (estudo escolhido, preço,
+    # limiares) e a linha resultante. PAR com as mesmas entradas reaproveita a
+    # linha (só data/hora mudam); o resto é recalculado.
+    # As linhas ficam no cache LRU compartilhado (mfe_cache): se forem despejadas
+    # por orçamento de memória, o PAR só é recalculado no próximo ciclo.
+    _seq = 0
+
+    def __init__(self, cache=None):
+        import mfe_cache
+        self.cache = cache or mfe_cache.shared()
+        ParTracker._seq += 1
+        self.ns = ("row", ParTracker._seq)
+        self.recalculados = 0
+        self.reaproveitados = 0
+
+    def begin_cycle(self):
+        self.recalculados = 0
+        self.reaproveitados = 0
+
+    def row(self, e, preco: float, data_str: str, hora_str: str, ci=False) -> dict:
+        par = e["PAR"]
+        ci_key = tuple(sorted(ci.items())) if ci else ci
+        key = (e["LADO"], float(e["PERCENTIL"]), float(e["ALVO_PCT"]), preco, ASSERT_MIN, GAIN_MIN, ASSERT_MODE, ci_key)
+        hit = self.cache.get((self.ns, par))
+        if hit is not None and hit[0] == key:
+            self.reaproveitados += 1
+            row = dict(hit[1])
+            row["data"] = data_str
+            row["hora"] = hora_str
+            return row
+        self.recalculados += 1
+        row = build_row(e, preco, data_str, hora_str, ci)
+        self.cache.put((self.ns, par), (key, row))
+        return dict(row)
+
+    def forget(self, par: str):
+        self.cache.pop((self.ns, par))
+
+    def prune(self, pars):
+        keep = set(pars)
+        self.cache.drop_where(lambda k: k[0] == self.ns and k[1] not in keep)
+
+    def stats(self) -> dict:
+        pares = len(self.cache.keys_where(lambda k: k[0] == self.ns))
+        return {"recalculados": self.recalculados, "reaproveitados": self.reaproveitados, "pares": pares}
+
+def build_output(prices=None, estudos=None, escolhidos=None, tracker=None, quarentena=None, persist=True):
+    # Sem argumentos: lê tudo dos arquivos (modo clássico).
+    # Modo residente: recebe o estado em memória e um ParTracker persistente.
+    if prices is None:
+        prices, quarentena = load_prices_checked()
+    quarentena = quarentena or {}
+    if estudos is None:
+        estudos, escolhidos = load_estudos_any(CSV_PATH)
+    if escolhidos is None:
+        escolhidos = choose_columnar(estudos) if hasattr(estudos, "alvo_pct") else choose_best_per_par(estudos)
+    if tracker is None:
+        tracker = ParTracker()
+    tracker.begin_cycle()
 
     t = now_brt()
     data_str = t.strftime("%Y-%m-%d")
     hora_str = t.strftime("%H:%M")
 
+    cis = {}
+    if ASSERT_CI:
+        import mfe_ci
+        cis = mfe_ci.for_escolhidos(escolhidos)
+
+    import mfe_aggs
+    agg = mfe_aggs.Agregador()
     out_rows = []
-    total_sinais = 0
 
     for e in escolhidos:
-        par = e["PAR"]
-        lado = e["LADO"]
-        percentil = float(e["PERCENTIL"])
-        alvo_pct = float(e["ALVO_PCT"])
-
-        preco = float(prices.get(par, 0.0) or 0.0)
+        preco = float(prices.get(e["PAR"], 0.0) or 0.0)
+        row = tracker.row(e, preco, data_str, hora_str, cis.get(e["PAR"]) if ASSERT_CI else False)
+        if preco <= 0:
+            # motivo do fallback fica visível na linha (antes era 0.0 silencioso)
+            row["preco_motivo"] = quarentena.get(e["PAR"], "SEM_PRECO")
+        out_rows.append(agg.add(row))
+    tracker.prune(e["PAR"] for e in escolhidos)
 
-        # Filtro oficial (se não bate mínimo, vira “NÃO ENTRAR”)
-        if percentil < ASSERT_MIN or alvo_pct < GAIN_MIN or preco <= 0:
-            side = "NÃO ENTRAR"
-            alvo = ""
-            ganho_pct = ""
-        else:
-            side = lado if lado in ("LONG","SHORT") else "NÃO ENTRAR"
-            if side == "LONG":
-                alvo = round(preco * (1.0 + alvo_pct/100.0), 3)
-            elif side == "SHORT":
-                alvo = round(preco * (1.0 - alvo_pct/100.0), 3)
-            else:
-                alvo = ""
-            ganho_pct = round(alvo_pct, 2)
-            if side != "NÃO ENTRAR":
-                total_sinais += 1
-
-        zona = zone_from_percentil(percentil)
-        risco = risco_from_percentil(percentil)
-        prioridade = prioridade_from_gain(float(alvo_pct), zona)
-
-        out_rows.append({
-            "par": par,
-            "side": side,
-            "preco": round(preco, 3) if preco else 0.0,
-            "alvo": alvo if alvo != "" else "",
-            "ganho_pct": ganho_pct if ganho_pct != "" else "",
-            "zona": zona,
-            "risco": risco,
-            "prioridade": prioridade,
-            "data": data_str,
-            "hora": hora_str,
-        })
+    if DB_PATH and persist:
+        persist_db(estudos, prices, out_rows)
 
     payload = {
         "posicional": out_rows,
@@ -184,19 +362,197 @@ def build_output():
         "server_now": f"{data_str} {hora_str}",
         "assert_min": ASSERT_MIN,
         "gain_min": GAIN_MIN,
-        "total_sinais": total_sinais,
+        "assert_mode": ASSERT_MODE,
+        "total_sinais": agg.sinais,
+        "agregados": agg.result(),
     }
+    if quarentena:
+        payload["quarentena"] = quarentena
     return payload
 
-def main():
-    payload = build_output()
+def allocate(payload: dict) -> dict:
+    # etapa depois do build_output: sizing dos sinais ativos (peso_pct + resumo em "alocacao")
+    if not ALLOC:
+        return payload
+    try:
+        import mfe_alloc
+        payload["alocacao"] = mfe_alloc.allocate(payload["posicional"])
+    except Exception as e:
+        # sem sizing o payload continua válido
+        print(f"[WARN] alocação falhou: {e}")
+    return payload
 
+def publish(payload: dict, path: str = None):
     # Regra crítica: se der qualquer problema grave, NÃO apagar o último JSON
     # Aqui só escreve se payload tem lista não vazia.
     if not isinstance(payload.get("posicional"), list) or len(payload["posicional"]) == 0:
         raise RuntimeError("Sem linhas para escrever (posicional vazio).")
 
-    atomic_write_json(OUT_JSON, payload)
+    atomic_write_json(path or OUT_JSON, payload)
+    # o snapshot em memória é o do painel (entrada.json)
+    if SHM_PATH and (path is None or path == OUT_JSON):
+        import mfe_shm
+        mfe_shm.publish_json(SHM_PATH, payload)
+
+# ---- modo residente: recalcula por evento de arquivo ----
+def changed_pars(old_prices: dict, new_prices: dict, old_esc: dict, new_esc: dict) -> set:
+    out = {p for p in new_esc if old_esc.get(p) != new_esc[p]}
+    out.update(set(old_esc) - set(new_esc))  # PAR que saiu do CSV: a linha dele tem que sumir
+    out.update(p for p in new_esc if old_prices.get(p) != new_prices.get(p))
+    return out
+
+def run_enrich():
+    try:
+        import mfe_enrich
+        mfe_enrich.main()
+    except Exception as e:
+        print(f"[WARN] enrich falhou: {e}")
+
+class WorkerState:
+    # Estado em memória do processo residente (estudos, preços, tracker).
+    # Loop de eventos e servidor de controle (mfe_ctl) compartilham via lock;
+    # o lock só é segurado durante o cálculo/publicação (milissegundos). Com
+    # self.enrich todo recompute (inclusive do mfe_ctl) roda o mfe_enrich depois,
+    # fora desse lock (ele vai à rede) e sob enrich_lock: dois enrich nunca
+    # escrevem ao mesmo tempo e o último sempre parte da última publicação.
+    def __init__(self, enrich: bool = False):
+        import threading
+        self.lock = threading.Lock()
+        self.enrich_lock = threading.Lock()
+        self.enrich = enrich
+        self.sanity = None
+        if PRICE_SANITY:
+            import mfe_sanity
+            self.sanity = mfe_sanity.PriceSanity()
+        self.tracker = ParTracker()
+        self.estudos, esc = load_estudos_any(CSV_PATH)
+        self.esc = {e["PAR"]: e for e in esc}
+        self.checked, self.stamps = self._load_prices()
+        self.prices, self.quarentena = self._expired(self.checked, self.stamps)
+        self.payload = None
+        self.ciclos = 0
+        self.ultimo_ms = 0.0
+
+    def _load_prices(self):
+        # (preços, quarentena) checados + instante de cada preço (para o limite de idade)
+        checked = load_prices_checked(self.sanity)
+        if not PRICE_SANITY:
+            return checked, {}
+        import mfe_sanity
+        return checked, mfe_sanity.load_price_stamps(PRICES_PATH, checked[0])
+
+    def _expired(self, checked, stamps):
+        # arquivo de preços parado também envelhece: idade reaplicada a cada tick
+        if not PRICE_SANITY:
+            return checked
+        import mfe_sanity
+        return mfe_sanity.expire(checked[0], checked[1], stamps)
+
+    def reload(self, changed) -> set:
+        # relê só os arquivos alterados (vazio = só reaplica a idade dos preços);
+        # devolve os PARs com entrada diferente
+        estudos, esc = self.estudos, self.esc
+        if os.path.abspath(CSV_PATH) in changed:
+            estudos, esc = load_estudos_any(CSV_PATH)
+            esc = {e["PAR"]: e for e in esc}
+        checked, stamps = self.checked, self.stamps
+        if os.path.abspath(PRICES_PATH) in changed:
+            checked, stamps = self._load_prices()
+        prices, quar = self._expired(checked, stamps)
+        with self.lock:
+            only = changed_pars(self.prices, prices, self.esc, esc)
+            self.estudos, self.esc, self.prices, self.quarentena = estudos, esc, prices, quar
+            self.checked, self.stamps = checked, stamps
+        return only
+
+    def recompute(self, pars=None) -> dict:
+        with self.lock:
+            t0 = time.perf_counter()
+            for par in pars or ():
+                self.tracker.forget(par)  # força recálculo desses PARs
+            payload = build_output(self.prices, self.estudos, [self.esc[k] for k in sorted(self.esc)],
+                                   self.tracker, self.quarentena)
+            publish(allocate(payload))
+            self.payload = payload
+            self.ciclos += 1
+            self.ultimo_ms = round((time.perf_counter() - t0) * 1000.0, 2)
+        if self.enrich:
+            with self.enrich_lock:
+                run_enrich()
+        return payload
+
+    def set_thresholds(self, assert_min=None, gain_min=None):
+        # as chaves do ParTracker incluem os limiares: o próximo recompute
+        # recalcula todos os PARs
+        # converte os dois antes de atribuir: valor inválido não deixa meia troca
+        global ASSERT_MIN, GAIN_MIN
+        a = float(assert_min) if assert_min is not None else None
+        g = float(gain_min) if gain_min is not None else None
+        with self.lock:
+            if a is not None:
+                ASSERT_MIN = a
+            if g is not None:
+                GAIN_MIN = g
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {
+                **self.tracker.stats(),
+                "cache": self.tracker.cache.stats(),
+                "ciclos": self.ciclos,
+                "ultimo_ms": self.ultimo_ms,
+                "estudos": len(self.estudos),
+                "universo": len(self.esc),
+                "precos": len(self.prices),
+                "quarentena": len(self.quarentena),
+                "assert_min": ASSERT_MIN,
+                "gain_min": GAIN_MIN,
+                "total_sinais": (self.payload or {}).get("total_sinais"),
+                "ultima_atualizacao": (self.payload or {}).get("ultima_atualizacao"),
+            }
+
+def run_watch():
+    import mfe_watch
+    watcher = mfe_watch.Watcher([CSV_PATH, PRICES_PATH, COINS_FILE], debounce=WATCH_DEBOUNCE, poll=WATCH_POLL,
+                                max_wait=WATCH_MAX_WAIT)
+    print(f"[WATCH] modo={watcher.mode} | {CSV_PATH} | {PRICES_PATH} | {COINS_FILE}")
+
+    state = WorkerState(enrich=WATCH_ENRICH)
+    state.recompute()
+    if CTL_SOCK:
+        import mfe_ctl
+        mfe_ctl.serve(CTL_SOCK, state)
+        print(f"[CTL] {CTL_SOCK}")
+
+    while True:
+        # timeout = tick: sem evento ainda reaplica a idade dos preços (VELHO)
+        changed = watcher.wait(WATCH_POLL)
+        try:
+            only = state.reload(changed)
+        except Exception as e:
+            # CSV no meio de uma cópia etc.: mantém o estado anterior
+            print(f"[WARN] entrada inválida, mantendo estado: {e}")
+            continue
+
+        coins_changed = os.path.abspath(COINS_FILE) in changed
+        if not only and not coins_changed:
+            continue
+
+        try:
+            payload = state.recompute()
+        except Exception as e:
+            print(f"[ERRO] ciclo: {e}")
+            continue
+        st = state.tracker.stats()
+        print(f"[OK] Atualizado: {payload.get('ultima_atualizacao')} | Recalculados: {st['recalculados']} | Reaproveitados: {st['reaproveitados']} | Total sinais: {payload.get('total_sinais')}")
+
+def main():
+    if "--watch" in sys.argv[1:] or TRIGGER == "watch":
+        run_watch()
+        return
+
+    payload = build_output()
+    publish(allocate(payload))
 
     print(f"[OK] Atualizado: {payload.get('ultima_atualizacao')} | Total exibidas: {len(payload['posicional'])} | Total sinais: {payload.get('total_sinais')}")
 